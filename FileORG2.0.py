@@ -1,8 +1,23 @@
+import atexit
 import os  # For file operations
+import gzip  # For compact saved move plans
+import argparse  # For the non-interactive command line
+import contextlib
+import errno
+import fnmatch  # For exclude globs
+import hashlib  # For duplicate detection
 import json
+import random  # For synthetic benchmark trees
+import re
+import select
+import shutil
+import struct
 import sys
 import time  # For timestamps and date formatting
-from tqdm import tqdm  # For the progress bar
+import threading
+import uuid
+from collections import namedtuple
+# tqdm, concurrent.futures, ctypes and tempfile are imported lazily where used to keep startup fast
 
 
 # Configure encoding for Unicode support
@@ -70,20 +85,384 @@ def chat_support_interface():
                 "❓ Sorry, I didn't understand that. Try asking about one of the menu options, such as 'Sort videos by type and date' or 'Multi-Folder Support'.\n"
             )
 
+def progress_bar(total, desc="Moving files"):
+    """
+    Returns a tqdm progress bar, or a disabled one when settings["progress"] is off.
+    The bar redraws at most every settings["progress_interval"] seconds.
+    tqdm is imported on first use so the command line starts fast.
+    """
+    from tqdm import tqdm
+    return tqdm(total=total, desc=desc, unit="file", disable=not settings["progress"],
+                mininterval=settings["progress_interval"])
+
+
 def pause_and_clear():
     """Waits for user input then clears the terminal screen."""
     input("Press Enter to continue...")
     clear_screen()
 
 
-def count_files(folder):
+class Profiler:
     """
-    Returns the total number of files in the given folder (including subdirectories).
+    Optional instrumentation for organizer runs: wall time per phase (scan, classify, execute, ...),
+    and per operation type (scandir, listdir, makedirs, rename, ...) a call count, total time and a
+    log2 latency histogram, plus the directories where operations spent the most time.
+    Can also keep a Chrome trace (chrome://tracing, Perfetto) of phases and operations.
+    While disabled, start() returns None and stop() returns at once, so the hot paths
+    only pay for two method calls.
     """
-    count = 0
-    for _, _, files in os.walk(folder):
-        count += len(files)
-    return count
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_limit = 0
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._origin = time.perf_counter()
+        self.phases = {}  # Phase -> seconds
+        self.operations = {}  # Operation -> [count, seconds, histogram (count per power-of-two microseconds)]
+        self.folders = {}  # Folder -> seconds spent in operations on it
+        self.trace = []
+
+    def enable(self, trace_limit=0):
+        """
+        Starts collecting from scratch. trace_limit > 0 also keeps up to that many trace events.
+        """
+        self.reset()
+        self.trace_limit = trace_limit
+        self.enabled = True
+
+    def start(self):
+        return time.perf_counter() if self.enabled else None
+
+    def stop(self, operation, start, folder=None):
+        """
+        Records one operation that began at start (from start()); a no-op when profiling is off.
+        """
+        if start is None:
+            return
+        end = time.perf_counter()
+        seconds = end - start
+        with self._lock:
+            stats = self.operations.get(operation)
+            if stats is None:
+                stats = self.operations[operation] = [0, 0.0, [0] * 40]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2][min(int(seconds * 1e6).bit_length(), 39)] += 1
+            if folder is not None:
+                self.folders[folder] = self.folders.get(folder, 0.0) + seconds
+            if len(self.trace) < self.trace_limit:
+                self.trace.append((operation, start, end, threading.get_ident(), folder))
+
+    @contextlib.contextmanager
+    def _phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + end - start
+                if self.trace_limit:
+                    self.trace.append((name, start, end, threading.get_ident(), "phase"))
+
+    def phase(self, name):
+        """
+        Context manager timing a phase of the run.
+        """
+        return self._phase(name) if self.enabled else contextlib.nullcontext()
+
+    def summary(self, slowest=10):
+        """
+        Returns the collected measurements as a JSON-serializable dict.
+        Percentiles are upper bounds of the histogram bucket they fall in.
+        """
+        def percentile(histogram, count, fraction):
+            seen = 0
+            for bucket, bucket_count in enumerate(histogram):
+                seen += bucket_count
+                if seen >= fraction * count:
+                    return 1 << bucket
+            return None
+
+        with self._lock:
+            operations = {}
+            for operation, (count, seconds, histogram) in sorted(self.operations.items(), key=lambda item: -item[1][1]):
+                last = max(i for i, bucket_count in enumerate(histogram) if bucket_count)
+                operations[operation] = {
+                    "count": count, "seconds": round(seconds, 6), "mean_us": round(seconds / count * 1e6, 2),
+                    "p50_us": percentile(histogram, count, 0.5), "p99_us": percentile(histogram, count, 0.99),
+                    "histogram_us": {f"<{1 << i}": histogram[i] for i in range(last + 1) if histogram[i]}}
+            folders = sorted(self.folders.items(), key=lambda item: -item[1])[:slowest]
+            return {"phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+                    "operations": operations,
+                    "slowest_folders": [{"folder": folder, "seconds": round(seconds, 6)} for folder, seconds in folders]}
+
+    def print_summary(self):
+        """
+        Prints the phases, operations and slowest folders as a short table.
+        """
+        summary = self.summary()
+        print("Phase times: " + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in summary["phases"].items()))
+        for operation, stats in summary["operations"].items():
+            print(f"  {operation:>16}: {stats['count']:>9} calls, {stats['seconds']:.3f}s, "
+                  f"mean {stats['mean_us']}us, p50 <{stats['p50_us']}us, p99 <{stats['p99_us']}us")
+        for item in summary["slowest_folders"][:5]:
+            print(f"  slow folder: {item['folder']} ({item['seconds']:.3f}s)")
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=4)
+
+    def save_trace(self, path):
+        """
+        Writes the trace events in Chrome trace event format.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"displayTimeUnit":"ms","traceEvents":[\n')
+            with self._lock:
+                for i, (name, start, end, thread, folder) in enumerate(self.trace):
+                    event = {"name": name, "cat": "phase" if folder == "phase" else "op", "ph": "X", "pid": os.getpid(),
+                             "tid": thread, "ts": round((start - self._origin) * 1e6, 3),
+                             "dur": round((end - start) * 1e6, 3)}
+                    if folder is not None and folder != "phase":
+                        event["args"] = {"folder": folder}
+                    f.write(("," if i else "") + json.dumps(event) + "\n")
+            f.write("]}\n")
+
+
+profiler = Profiler()
+
+
+class EventLog:
+    """
+    Buffered, structured sink for per-file events (planned, moved, skipped, ...).
+    Events are not printed one by one: report() prints counts per event, category and
+    target folder (with a few example names), so console output does not grow with the
+    number of files. When a path is set, every event is also appended to it as a JSON line,
+    written in batches. Safe to use from worker threads.
+    """
+
+    # Event -> console label used by report()
+    labels = {
+        "planned": "[DRY RUN] Would move",
+        "moved": "Moved",
+        "skipped": "Skipped (already exists)",
+        "deduplicated": "Removed as duplicates",
+        "unreadable": "Skipped (could not read modification time)",
+        "source_missing": "Skipped (source no longer exists)",
+        "undone": "Restored",
+        "undo_missing": "Not found, could not restore",
+        "restore_planned": "[DRY RUN] Would restore"
+    }
+
+    def __init__(self, path=None, batch_size=1000, examples=3):
+        self.path = path
+        self.batch_size = batch_size
+        self.examples = examples
+        self._counts = {}  # Event -> [total, {category: count}, {target folder: count}, example names]
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def emit(self, event, source=None, target=None, category=None, **fields):
+        """
+        Records one event about a file.
+        """
+        with self._lock:
+            counts = self._counts.get(event)
+            if counts is None:
+                counts = self._counts[event] = [0, {}, {}, []]
+            counts[0] += 1
+            if category is not None:
+                counts[1][category] = counts[1].get(category, 0) + 1
+            if target is not None:
+                folder = os.path.dirname(target)
+                counts[2][folder] = counts[2].get(folder, 0) + 1
+            if len(counts[3]) < self.examples and (source or target):
+                counts[3].append(os.path.basename(source or target))
+            if self.path:
+                record = {"event": event, "time": round(time.time(), 3), "source": source, "target": target}
+                if category is not None:
+                    record["category"] = category
+                record.update(fields)
+                self._buffer.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+                if len(self._buffer) >= self.batch_size:
+                    self._write()
+
+    def _write(self):
+        if self._buffer:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(self._buffer)
+            self._buffer.clear()
+
+    def flush(self):
+        with self._lock:
+            if self.path:
+                self._write()
+
+    def report(self, top_folders=10):
+        """
+        Prints the aggregated events since the last report, flushes the log file and resets the counts.
+        Returns {event: total}.
+        """
+        self.flush()
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        for event, (total, by_category, by_folder, examples) in counts.items():
+            line = f"{self.labels.get(event, event)}: {total} file{'s' if total != 1 else ''}"
+            if examples:
+                line += f" (e.g. {', '.join(examples)}{', ...' if total > len(examples) else ''})"
+            print(line)
+            if by_category:
+                print("    by category: " + ", ".join(
+                    f"{category} {count}" for category, count in sorted(by_category.items(), key=lambda item: -item[1])))
+            if len(by_folder) > 1 or by_category:
+                folders = sorted(by_folder.items(), key=lambda item: -item[1])
+                text = ", ".join(f"{folder} {count}" for folder, count in folders[:top_folders])
+                if len(folders) > top_folders:
+                    text += f" (and {len(folders) - top_folders} more folders)"
+                print("    by target folder: " + text)
+        if self.path and counts:
+            print(f"Details saved to '{self.path}'.")
+        return {event: values[0] for event, values in counts.items()}
+
+
+event_log = EventLog()
+
+
+def scan_files(folder, prune=None, state=None, exclude=None):
+    """
+    Walks the given folder (including subdirectories) once with os.scandir and
+    returns a list of os.DirEntry objects for every file found.
+    The list length feeds the progress bar total and the entries feed the move phase,
+    so each tree is traversed only once per run. DirEntry caches its stat result,
+    so later mtime lookups do not hit the disk again.
+
+    prune is an optional set of directory paths that are not descended into, and exclude an
+    optional compiled pattern (see compile_exclude_globs) for directory names or paths
+    relative to the folder that are skipped as well.
+    state is an optional directory state cache ({path: [inode, mtime_ns, subdir names]}) from
+    a previous run: directories whose inode and mtime are unchanged are not listed again (only
+    their cached subdirectories are visited), so only new or changed entries are returned.
+    The cache is updated in place.
+    """
+    return list(iter_files(folder, prune, state, exclude))
+
+
+def iter_files(folder, prune=None, state=None, exclude=None):
+    """
+    Generator form of scan_files: yields the os.DirEntry objects one at a time, so trees with
+    millions of files can be streamed without holding every entry in memory.
+    The state cache is only updated once the generator is exhausted.
+    """
+    pending = [folder]
+    new_state = {} if state is not None else None
+    while pending:
+        current = pending.pop()
+        if state is not None:
+            start = profiler.start()
+            try:
+                st = os.stat(current)
+            except OSError:
+                continue
+            profiler.stop("stat", start, current)
+            cached = state.get(current)
+            if cached is not None and cached[0] == st.st_ino and cached[1] == st.st_mtime_ns:
+                new_state[current] = cached
+                subdirs = [os.path.join(current, name) for name in cached[2]]
+                subdirs = [path for path in subdirs if not prune or path not in prune]
+                if exclude is not None:
+                    subdirs = [path for path in subdirs if not is_excluded(exclude, folder, path)]
+                pending.extend(reversed(subdirs))
+                continue
+        start = profiler.start()
+        try:
+            with os.scandir(current) as it:
+                subdirs = []
+                files = []
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        # Like os.walk, do not descend into symlinked directories
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                    else:
+                        files.append(entry)
+        except OSError:
+            continue  # Unreadable directory, same as os.walk's default behaviour
+        profiler.stop("scandir", start, current)
+        # Yielded after the listing is closed, so one directory at a time is held in memory
+        yield from files
+        if state is not None:
+            # Stat taken before listing, so anything added meanwhile is seen again next run
+            new_state[current] = [st.st_ino, st.st_mtime_ns, [os.path.basename(path) for path in subdirs]]
+        if prune:
+            subdirs = [path for path in subdirs if path not in prune]
+        if exclude is not None:
+            subdirs = [path for path in subdirs if not is_excluded(exclude, folder, path)]
+        # Reverse so directories are visited in listing order (top-down, like os.walk)
+        pending.extend(reversed(subdirs))
+    if state is not None:
+        state.clear()
+        state.update(new_state)
+
+
+def compile_exclude_globs(globs):
+    """
+    Compiles a collection of glob patterns (e.g. ".git", "node_modules", "Archive/*") into one
+    regular expression, or returns None when there are no patterns.
+    """
+    if not globs:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(glob)})" for glob in globs))
+
+
+def is_excluded(exclude, folder, path):
+    """
+    Returns True if the directory name or its path relative to folder matches the exclude pattern.
+    """
+    if exclude.match(os.path.basename(path)):
+        return True
+    return exclude.match(os.path.relpath(path, folder).replace(os.sep, "/")) is not None
+
+
+def load_scan_state(folder, mode="type"):
+    """
+    Returns the persisted directory state cache for the given folder and organizer mode, or an empty dict.
+    """
+    path = settings["scan_state"]
+    if not os.path.exists(path):
+        return {}
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f).get(f"{mode}:{os.path.abspath(folder)}", {})
+    except (OSError, ValueError):
+        return {}  # A corrupt cache only costs a full scan
+
+
+def save_scan_state(folder, state, mode="type"):
+    """
+    Persists the directory state cache for the given folder and organizer mode, replacing the file atomically.
+    Modes are cached separately because they leave different files behind.
+    """
+    path = settings["scan_state"]
+    all_states = {}
+    if os.path.exists(path):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                all_states = json.load(f)
+        except (OSError, ValueError):
+            all_states = {}
+    all_states[f"{mode}:{os.path.abspath(folder)}"] = state
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+        json.dump(all_states, f, separators=(",", ":"))
+    os.replace(temp_path, path)
 
 
 # Language dictionary for supporting different languages (English, Spanish, French, Chinese Simplified, Hindi)
@@ -103,6 +482,7 @@ translations = {
         "sort_photos_by_date": "Sort photos by type and by date",
         "sort_videos_by_date": "Sort videos by type and by date",
         "dry_run": "Dry run (Preview organization)",
+        "execute_plan": "Execute a saved move plan",
         "exit": "Exit"
     },
     "es": {
@@ -120,6 +500,7 @@ translations = {
         "sort_photos_by_date": "Ordenar fotos por tipo y por fecha",
         "sort_videos_by_date": "Ordenar vídeos por tipo y por fecha",
         "dry_run": "Prueba (Previsualización de organización)",
+        "execute_plan": "Ejecutar un plan de movimientos guardado",
         "exit": "Salir"
     },
     "fr": {
@@ -137,6 +518,7 @@ translations = {
         "sort_photos_by_date": "Trier les photos par type et par date",
         "sort_videos_by_date": "Trier les vidéos par type et par date",
         "dry_run": "Essai (Aperçu de l'organisation)",
+        "execute_plan": "Exécuter un plan de déplacement enregistré",
         "exit": "Quitter"
     },
     "zh": {
@@ -154,6 +536,7 @@ translations = {
         "sort_photos_by_date": "按类型和日期对照片进行排序",
         "sort_videos_by_date": "按类型和日期对视频进行排序",
         "dry_run": "试运行（预览组织）",
+        "execute_plan": "执行已保存的移动计划",
         "exit": "退出"
     },
     "hi": {
@@ -171,13 +554,34 @@ translations = {
         "sort_photos_by_date": "फोटो को प्रकार और तारीख के अनुसार क्रमबद्ध करें",
         "sort_videos_by_date": "वीडियो को प्रकार और तारीख के अनुसार क्रमबद्ध करें",
         "dry_run": "ड्राई रन (पूर्वावलोकन संगठन)",
+        "execute_plan": "सहेजी गई स्थानांतरण योजना चलाएँ",
         "exit": "बाहर निकलें"
     }
 }
 
+# Per-user folder for the state files below, so they do not depend on the working directory
+# (cron jobs, shortcuts); FILEORG_HOME overrides it
+state_dir = os.environ.get("FILEORG_HOME") or (
+    os.path.join(os.environ.get("APPDATA") or os.path.expanduser("~"), "FileOrg") if os.name == "nt"
+    else os.path.join(os.path.expanduser("~"), ".fileorg"))
+with contextlib.suppress(OSError):
+    os.makedirs(state_dir, exist_ok=True)
+
 # Shared settings container
 settings = {
-    "language": "en"  # Default language
+    "language": "en",  # Default language
+    "undo_journal": os.path.join(state_dir, "undo_journal.jsonl"),  # On-disk journal of file moves
+    "scan_state": os.path.join(state_dir, "scan_state.json.gz"),  # Directory state cache for incremental runs
+    "exclude_globs": [],  # Directory name/path globs that organizers never descend into
+    "progress": True,  # Show tqdm progress bars
+    "progress_interval": 0.5,  # Minimum seconds between progress bar redraws
+    "metadata_cache": os.path.join(state_dir, "metadata_cache.sqlite3"),  # Capture dates read from photo/video metadata
+    "duplicates_report": "duplicates_report.jsonl",  # Report written by find_duplicate_files
+    "restore_point": os.path.join(state_dir, "restore_point.jsonl.gz"),  # Default restore point file
+    "category_config": os.path.join(state_dir, "categories.json"),  # Saved categories and classification rules
+    "sniff_content": False,  # Classify files with unknown extensions by their first bytes
+    "sniff_workers": 8,  # Threads reading files for content sniffing
+    "verify_copies": False  # Re-read and hash files copied to another filesystem before deleting the source
 }
 
 # File categories dictionary (used for sorting by type)
@@ -194,8 +598,525 @@ categories = {
     "System Files": {".sys", ".dll", ".ini", ".log"}
 }
 
-# Global undo log to record file moves (for undo functionality)
-undo_log = []
+# Reverse lookup index (extension -> category) compiled from the categories dictionary.
+# Classification is a single dict probe per file, however many categories exist.
+extension_index = {}
+
+
+def rebuild_extension_index():
+    """
+    Rebuilds the extension index from scratch.
+    When an extension appears in several categories the first one (in dictionary order) wins.
+    """
+    extension_index.clear()
+    for category, exts in categories.items():
+        for ext in exts:
+            extension_index.setdefault(ext, category)
+
+
+def reindex_extensions(extensions):
+    """
+    Recomputes the index entry of only the given extensions after the categories dictionary was edited.
+    """
+    for ext in extensions:
+        owner = next((key for key, exts in categories.items() if ext in exts), None)
+        if owner is None:
+            extension_index.pop(ext, None)
+        else:
+            extension_index[ext] = owner
+
+
+def classify_extension(file_extension):
+    """
+    Returns the category for a lowercase file extension, or "Other Files" when none matches.
+    """
+    return extension_index.get(file_extension, "Other Files")
+
+
+def set_category(category, extensions):
+    """
+    Adds a category (or replaces its extensions), updates the extension index and saves the configuration.
+    """
+    affected = set(categories.get(category, set())) | set(extensions)
+    categories[category] = set(extensions)
+    reindex_extensions(affected)
+    save_category_config()
+
+
+def remove_category(category):
+    """
+    Removes a category, updates the extension index and saves the configuration.
+    """
+    affected = categories.pop(category)
+    reindex_extensions(affected)
+    save_category_config()
+
+
+def add_category_extensions(category, extensions):
+    """
+    Adds extensions to an existing category, updates the extension index and saves the configuration.
+    """
+    categories[category].update(extensions)
+    reindex_extensions(extensions)
+    save_category_config()
+
+
+def remove_category_extensions(category, extensions):
+    """
+    Removes extensions from an existing category, updates the extension index and saves the configuration.
+    """
+    categories[category] = {ext for ext in categories[category] if ext not in extensions}
+    reindex_extensions(extensions)
+    save_category_config()
+
+
+# Classification rules, checked before the extension index; the first listed rule that matches wins.
+# Each rule names a category (an existing one or a new one) and conditions that must all hold:
+#   "ext": extension(s), including compound ones like ".tar.gz"   "glob": file name glob(s), e.g. "IMG_*"
+#   "name": regex(es) searched in the file name                   "path": regex(es) searched in the full path
+#   "min_size" / "max_size": bytes, or "10KB", "2.5GB", ...
+#   "modified_after" / "modified_before": "YYYY-MM-DD"            "min_age_days" / "max_age_days": days
+# Extensions and globs ignore case; regexes can use (?i) for that.
+classification_rules = [
+    {"category": "Compressed Files", "ext": [".tar.gz", ".tar.bz2", ".tar.xz", ".tar.zst", ".tgz"]}
+]
+
+rule_conditions = {"ext", "glob", "name", "path", "min_size", "max_size",
+                   "modified_after", "modified_before", "min_age_days", "max_age_days"}
+size_units = {"": 1, "b": 1, "kb": 1 << 10, "mb": 1 << 20, "gb": 1 << 30, "tb": 1 << 40}
+leading_flags = re.compile(r"\(\?([aiLmsux]+)\)")
+
+
+def parse_size(size):
+    """
+    Returns a size in bytes from a number or a string such as "512", "10KB" or "2.5 GB".
+    """
+    if isinstance(size, (int, float)):
+        return size
+    match = re.fullmatch(r"\s*([\d.]+)\s*([a-zA-Z]*)\s*", str(size))
+    if match is None or match.group(2).lower() not in size_units:
+        raise ValueError(f"Invalid size: {size!r}")
+    return float(match.group(1)) * size_units[match.group(2).lower()]
+
+
+def as_list(value):
+    return [value] if isinstance(value, str) else list(value)
+
+
+class RuleMatcher:
+    """
+    Classification rules compiled for fast matching: extension-only rules become a dict,
+    glob/name/path-only rules share one pre-filter regex per kind, and the rest are checked one by one.
+    """
+
+    def __init__(self, rules):
+        self.categories = []
+        self.suffixes = {}  # Lowercase extension or compound extension -> rule index
+        self.max_dots = 0  # Most dots in any of those extensions
+        self.tails = set()  # Last extension of each compound extension (".gz" for ".tar.gz")
+        self.checked = []  # (rule index, predicates) for rules that need individual checks
+        glob_patterns = []
+        name_patterns = []
+        path_patterns = []
+        for index, rule in enumerate(rules):
+            conditions = {key: value for key, value in rule.items() if key != "category"}
+            unknown = set(conditions) - rule_conditions
+            if "category" not in rule or not conditions or unknown:
+                raise ValueError(f"Invalid classification rule {rule!r}: needs a category and at least one of "
+                                 f"{', '.join(sorted(rule_conditions))}")
+            self.categories.append(rule["category"])
+            if set(conditions) == {"ext"}:
+                for ext in as_list(conditions["ext"]):
+                    self.suffixes.setdefault(ext.lower(), index)
+                    self.max_dots = max(self.max_dots, ext.count("."))
+                    if ext.count(".") > 1:
+                        self.tails.add(ext[ext.rfind("."):].lower())
+            elif set(conditions) == {"glob"}:
+                glob_patterns.append((index, self._glob_regexes(conditions["glob"])))
+            elif set(conditions) == {"name"}:
+                name_patterns.append((index, self._compile_regexes(conditions["name"])))
+            elif set(conditions) == {"path"}:
+                path_patterns.append((index, self._compile_regexes(conditions["path"])))
+            else:
+                self.checked.append((index, self._predicates(conditions)))
+        # (combined regex, rules, rules it cannot rule out, search instead of match, which part of the file)
+        self.stages = [self._combine(patterns) + (search, field) for patterns, search, field in
+                       ((glob_patterns, False, 0), (name_patterns, True, 0), (path_patterns, True, 1)) if patterns]
+
+    @staticmethod
+    def _compile_regexes(regexes):
+        """
+        Compiles each regex on its own (ValueError if invalid), turning a leading (?i) into (?i:...).
+        """
+        compiled = []
+        for regex in as_list(regexes):
+            flags = ""
+            match = leading_flags.match(regex)
+            while match:
+                flags += match.group(1)
+                regex = regex[match.end():]
+                match = leading_flags.match(regex)
+            if flags:
+                # A verbose-mode comment would otherwise swallow the closing parenthesis
+                regex = f"(?{flags}:{regex}\n)" if "x" in flags else f"(?{flags}:{regex})"
+            try:
+                compiled.append(re.compile(regex))
+            except re.error as e:
+                raise ValueError(f"Invalid regex {regex!r} in classification rule: {e}") from None
+        return compiled
+
+    @staticmethod
+    def _glob_regexes(globs):
+        return [re.compile(f"(?i:{fnmatch.translate(glob)})") for glob in as_list(globs)]
+
+    @staticmethod
+    def _combine(patterns):
+        """
+        Returns a regex matching any group-free pattern (or None), the rules, and the rules with groups,
+        which are left out of it (joining would renumber their groups) and always checked.
+        """
+        plain = [regex.pattern for _, regexes in patterns for regex in regexes if not regex.groups]
+        regex = re.compile("|".join(f"(?:{pattern})" for pattern in plain)) if plain else None
+        unfiltered = [(index, regexes) for index, regexes in patterns if any(regex.groups for regex in regexes)]
+        return regex, patterns, unfiltered
+
+    def _predicates(self, conditions):
+        """
+        Returns the rule's checks as functions of (name, path, stat), cheapest first.
+        """
+        predicates = []
+        if "ext" in conditions:
+            exts = tuple(ext.lower() for ext in as_list(conditions["ext"]))
+            predicates.append(lambda name, path, stat: name.lower().endswith(exts))
+        if "glob" in conditions:
+            glob_regexes = self._glob_regexes(conditions["glob"])
+            predicates.append(lambda name, path, stat: any(regex.match(name) for regex in glob_regexes))
+        if "name" in conditions:
+            name_regexes = self._compile_regexes(conditions["name"])
+            predicates.append(lambda name, path, stat: any(regex.search(name) for regex in name_regexes))
+        if "path" in conditions:
+            path_regexes = self._compile_regexes(conditions["path"])
+            predicates.append(lambda name, path, stat: any(regex.search(path) for regex in path_regexes))
+        if "min_size" in conditions or "max_size" in conditions:
+            low = parse_size(conditions.get("min_size", 0))
+            high = parse_size(conditions.get("max_size", float("inf")))
+            predicates.append(lambda name, path, stat: low <= stat().st_size <= high)
+        if "modified_after" in conditions or "modified_before" in conditions:
+            after = (time.mktime(time.strptime(conditions["modified_after"], "%Y-%m-%d"))
+                     if "modified_after" in conditions else float("-inf"))
+            before = (time.mktime(time.strptime(conditions["modified_before"], "%Y-%m-%d"))
+                      if "modified_before" in conditions else float("inf"))
+            predicates.append(lambda name, path, stat: after <= stat().st_mtime < before)
+        if "min_age_days" in conditions or "max_age_days" in conditions:
+            min_age = float(conditions.get("min_age_days", 0)) * 86400
+            max_age = float(conditions.get("max_age_days", float("inf"))) * 86400
+            predicates.append(lambda name, path, stat: min_age <= time.time() - stat().st_mtime <= max_age)
+        return predicates
+
+    def match(self, name, path, stat):
+        """
+        Returns the category of the first rule the file matches, or None.
+        stat is called (at most once) only if a size or date condition needs it.
+        """
+        best = len(self.categories)
+        if self.suffixes:
+            dot = name.rfind(".")
+            if dot > 0:  # A leading dot marks a hidden file, not an extension
+                lower = name.lower()
+                ext = lower[dot:]
+                index = self.suffixes.get(ext)
+                if ext in self.tails:  # Could be the end of a compound extension
+                    position = dot
+                    for _ in range(self.max_dots - 1):
+                        position = lower.rfind(".", 1, position)
+                        if position == -1:
+                            break
+                        longer = self.suffixes.get(lower[position:])
+                        if longer is not None and (index is None or longer < index):
+                            index = longer  # The earlier rule wins, as everywhere else
+                if index is not None:
+                    best = index
+        for regex, patterns, unfiltered, search, field in self.stages:
+            text = path if field else name
+            if regex is None or (regex.search(text) if search else regex.match(text)) is None:
+                if not unfiltered:
+                    continue  # The common case: a single regex call rules out the whole stage
+                patterns = unfiltered
+            for index, regexes in patterns:
+                if index >= best:
+                    break
+                if any((regex.search(text) if search else regex.match(text)) for regex in regexes):
+                    best = index
+                    break
+        if self.checked:
+            cached = []
+
+            def cached_stat():
+                if not cached:
+                    cached.append(stat())
+                return cached[0]
+
+            for index, predicates in self.checked:
+                if index >= best:
+                    break
+                try:
+                    if all(predicate(name, path, cached_stat) for predicate in predicates):
+                        best = index
+                        break
+                except OSError:
+                    continue  # Could not stat the file; the rule does not apply
+        return self.categories[best] if best < len(self.categories) else None
+
+
+rule_matcher = None
+
+
+def rebuild_rule_matcher():
+    """
+    Compiles classification_rules (raising ValueError for an invalid rule).
+    With no rules classification is the plain extension lookup.
+    """
+    global rule_matcher
+    rule_matcher = RuleMatcher(classification_rules) if classification_rules else None
+
+
+def classify_file(name, path, stat):
+    """
+    Returns the category for a file: the first matching classification rule, otherwise the
+    category of its extension ("Other Files" when none matches). stat is a callable returning
+    the file's stat result, only called when a rule needs it.
+    """
+    if rule_matcher is not None:
+        category = rule_matcher.match(name, path, stat)
+        if category is not None:
+            return category
+    return classify_extension(os.path.splitext(name)[1].lower())
+
+
+def write_file_atomically(path, data):
+    """
+    Writes bytes to path through a temporary file that replaces it in one step,
+    so readers see either the old or the new content, never a partial file.
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def save_category_config(path=None):
+    """
+    Saves the categories and classification rules to the config file (settings["category_config"])
+    and the extension index to the cache file next to it, tagged with the config's SHA-256.
+    """
+    path = path or settings["category_config"]
+    config = {"categories": {category: sorted(exts) for category, exts in categories.items()},
+              "classification_rules": classification_rules}
+    raw = (json.dumps(config, indent=4, ensure_ascii=False) + "\n").encode("utf-8")
+    write_file_atomically(path, raw)
+    # Written after the config: a reader in between sees a hash mismatch and rebuilds
+    cache = {"hash": hashlib.sha256(raw).hexdigest(), "extension_index": extension_index}
+    write_file_atomically(path + ".cache", json.dumps(cache, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def load_category_config(path=None):
+    """
+    Loads the categories and classification rules from the config file, if there is one
+    (otherwise, or if it is invalid, the built-in defaults stay), and compiles the classification lookups.
+    The extension index is taken from the cache file when its hash matches the config,
+    so it is only rebuilt (and the cache rewritten) after the config changed.
+    Returns True when a config file was loaded.
+    """
+    global rule_matcher
+    path = path or settings["category_config"]
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        config = json.loads(raw)
+        new_categories = {category: set(exts) for category, exts in config.get("categories", categories).items()}
+        new_rules = list(config.get("classification_rules", []))
+        new_matcher = RuleMatcher(new_rules) if new_rules else None
+    except FileNotFoundError:
+        rebuild_extension_index()
+        rebuild_rule_matcher()
+        return False
+    except (OSError, ValueError, re.error, KeyError, TypeError, AttributeError) as e:
+        # Runs at import, so a bad config must never stop the program (not even --help)
+        print(f"Ignoring category config '{path}': {e}", file=sys.stderr)
+        rebuild_extension_index()
+        rebuild_rule_matcher()
+        return False
+    categories.clear()
+    categories.update(new_categories)
+    classification_rules[:] = new_rules
+    rule_matcher = new_matcher
+
+    digest = hashlib.sha256(raw).hexdigest()
+    try:
+        with open(path + ".cache", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if cache.get("hash") == digest:
+        extension_index.clear()
+        extension_index.update(cache["extension_index"])
+    else:
+        rebuild_extension_index()
+        try:
+            cache = {"hash": digest, "extension_index": extension_index}
+            write_file_atomically(path + ".cache", json.dumps(cache, ensure_ascii=False,
+                                                              separators=(",", ":")).encode("utf-8"))
+        except OSError:
+            pass  # Read-only location; the index is simply rebuilt next time
+    return True
+
+
+load_category_config()
+
+class UndoJournal:
+    """
+    Append-only, on-disk journal of file moves (for undo functionality).
+    Each line is a compact JSON record tagged with a run ID. Moves are buffered and written
+    in batches, or sooner once fsync_interval seconds have passed since the last fsync (which then
+    fsyncs them as well), and fsynced at the end of each run. So after a crash at most
+    fsync_interval seconds of completed moves are lost, without costing a syscall per file.
+    """
+
+    def __init__(self, path, batch_size=1000, fsync_interval=5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.run_id = None
+        self.run_moves = 0  # Moves recorded in the current (or last ended) run
+        self._buffer = []
+        self._last_fsync = time.monotonic()
+        self._lock = threading.Lock()  # Parallel moves record from worker threads
+
+    def _append(self, record):
+        self._buffer.append(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def begin_run(self):
+        """
+        Starts a new run and returns its ID.
+        """
+        with self._lock:
+            return self._begin_run()
+
+    def _begin_run(self):
+        self.run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.run_moves = 0
+        self._append({"op": "begin", "run": self.run_id, "timestamp": time.ctime()})
+        return self.run_id
+
+    def record_move(self, source, target):
+        """
+        Records one completed move, starting a run if none is active.
+        """
+        with self._lock:
+            if self.run_id is None:
+                self._begin_run()
+            self._append({"op": "move", "run": self.run_id, "source": source, "target": target})
+            self.run_moves += 1
+            self._write_due()
+
+    def record_dedupe(self, source, target):
+        """
+        Records a duplicate source that was removed because target has the same content.
+        """
+        with self._lock:
+            if self.run_id is None:
+                self._begin_run()
+            self._append({"op": "dedupe", "run": self.run_id, "source": source, "target": target})
+            self._write_due()
+
+    def _write_due(self):
+        # Slow moves (e.g. over NFS) may never fill a batch, so the interval also forces a write
+        sync = time.monotonic() - self._last_fsync >= self.fsync_interval
+        if sync or len(self._buffer) >= self.batch_size:
+            self._write(sync=sync)
+
+    def end_run(self):
+        """
+        Flushes and fsyncs the current run, if any. Returns the run ID that was ended.
+        """
+        run_id = self.run_id
+        if run_id is not None:
+            with self._lock:
+                self._append({"op": "end", "run": run_id})
+                self.run_id = None
+                self._write(sync=True)
+        return run_id
+
+    def write_marker(self, record):
+        """
+        Writes a single record immediately and fsyncs it (used for undo progress).
+        """
+        with self._lock:
+            self._append(record)
+            self._write(sync=True)
+
+    def flush(self):
+        with self._lock:
+            self._write(sync=False)
+
+    def _write(self, sync):
+        if not self._buffer:
+            return
+        start = profiler.start()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(self._buffer)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+                self._last_fsync = time.monotonic()
+        profiler.stop("journal_fsync" if sync else "journal_write", start)
+        self._buffer.clear()
+
+    def iter_backwards(self, start=None, chunk_size=1 << 16):
+        """
+        Yields (offset, record) pairs from the newest line to the oldest, reading the file in
+        chunks from the end so memory stays flat. start limits reading to lines before that offset.
+        Lines that are not valid JSON (e.g. cut short by a crash) are ignored.
+        """
+        self.flush()
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            position = f.seek(0, os.SEEK_END) if start is None else start
+            remainder = b""
+            while position > 0:
+                read_size = min(chunk_size, position)
+                position -= read_size
+                f.seek(position)
+                chunk = f.read(read_size) + remainder
+                lines = chunk.split(b"\n")
+                remainder = lines.pop(0)
+                end = position + len(chunk)
+                for line in reversed(lines):
+                    line_start = end - len(line)
+                    end = line_start - 1
+                    record = self._decode(line)
+                    if record is not None:
+                        yield line_start, record
+            record = self._decode(remainder)
+            if record is not None:
+                yield 0, record
+
+    @staticmethod
+    def _decode(line):
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+
+# Global undo journal recording file moves across sessions
+undo_journal = UndoJournal(settings["undo_journal"])
+atexit.register(undo_journal.end_run)
 
 
 def notify_user(message_key):
@@ -245,6 +1166,7 @@ def user_menu():
         "change_language": "🌐",  # Globe
         "manage_categories": "🗄️",  # Filing cabinet
         "Chat-like Support (Help)": "🤖",
+        "execute_plan": "▶️",  # Play
             "exit": "❌"  # Exit
     }
 
@@ -261,7 +1183,8 @@ def user_menu():
         f"9. {icons['change_language']} {translations[current_language]['change_language']}",
         f"10. {icons['manage_categories']} {translations[current_language]['manage_categories']}",
         f"11. 🤖 Chat-like Support (Help)",  # Added Help Bot Option
-        f"12. {icons['exit']} {translations[current_language]['exit']}"
+        f"12. {icons['execute_plan']} {translations[current_language]['execute_plan']}",
+        f"13. {icons['exit']} {translations[current_language]['exit']}"
     ]
 
     # Typing Animation for Intro Text
@@ -275,7 +1198,7 @@ def user_menu():
     # Capturing user input
     try:
         choice = int(input("Enter your choice: ").strip())
-        if choice not in range(1, 12):
+        if choice not in range(1, 14):
             raise ValueError
         return choice
     except ValueError:
@@ -303,349 +1226,1747 @@ def change_language():
         notify_user("invalid_input")
 
 
-def organize_files_by_type(folder, dry_run, conflict_resolution):
-    """
-    Organizes files in a given folder into subfolders based on file types.
-    Each file processed updates the progress bar.
-    """
-    total_files = count_files(folder)
-    with tqdm(total=total_files, desc="Moving files", unit="file") as pbar:
-        for root, _, files in os.walk(folder):
-            for file in files:
-                file_extension = os.path.splitext(file)[1].lower()
-                category = next((key for key, exts in categories.items() if file_extension in exts), "Other Files")
-                target_folder = os.path.join(folder, category)
-                if dry_run:
-                    print(f"[DRY RUN] {file} -> {target_folder}")
-                else:
-                    os.makedirs(target_folder, exist_ok=True)
-                    source_path = os.path.join(root, file)
-                    target_path = os.path.join(target_folder, file)
-                    if os.path.exists(target_path):
-                        if conflict_resolution == "skip":
-                            print(f"Skipping {file} (already exists)")
-                            pbar.update(1)
-                            continue
-                        elif conflict_resolution == "rename":
-                            base, ext = os.path.splitext(file)
-                            target_path = os.path.join(target_folder, f"{base}_copy{ext}")
-                        elif conflict_resolution == "overwrite":
-                            os.remove(target_path)
-                    os.rename(source_path, target_path)
-                    undo_log.append({"source": source_path, "target": target_path})
-                pbar.update(1)
+case_insensitive_devices = {}  # st_dev -> True if file names on that filesystem ignore case
 
 
-def organize_files_by_type_and_date(folder, dry_run, conflict_resolution):
+def is_case_insensitive(folder):
     """
-    Organizes files in a given folder into subfolders based on file type and modification date.
-    Each file processed updates the progress bar.
+    Returns True if folder (or its nearest existing parent) is on a case-insensitive filesystem.
+    Probed once per device by looking up a directory name with its case swapped.
     """
-    total_files = count_files(folder)
-    with tqdm(total=total_files, desc="Moving files", unit="file") as pbar:
-        for root, _, files in os.walk(folder):
-            for file in files:
-                file_extension = os.path.splitext(file)[1].lower()
-                category = next((key for key, exts in categories.items() if file_extension in exts), "Other Files")
-                source_path = os.path.join(root, file)
+    path = os.path.abspath(folder)
+    while True:
+        try:
+            st = os.stat(path)
+            break
+        except OSError:
+            parent = os.path.dirname(path)
+            if parent == path:
+                return os.name == "nt"
+            path = parent
+    device = st.st_dev
+    if device not in case_insensitive_devices:
+        result = os.name == "nt" or sys.platform == "darwin"  # When no name on the device has letters
+        while True:
+            parent, name = os.path.split(path)
+            if not name:
+                break
+            if name.swapcase() != name:
                 try:
-                    mtime = os.path.getmtime(source_path)
+                    result = os.path.samestat(os.stat(os.path.join(parent, name.swapcase())), st)
                 except OSError:
-                    print(f"Could not get modification time for {file}. Skipping.")
-                    pbar.update(1)
-                    continue
-                date_str = time.strftime("%Y-%m-%d", time.localtime(mtime))
-                target_folder = os.path.join(folder, category, date_str)
-                if dry_run:
-                    print(f"[DRY RUN] {file} -> {target_folder}")
-                else:
-                    os.makedirs(target_folder, exist_ok=True)
-                    target_path = os.path.join(target_folder, file)
-                    if os.path.exists(target_path):
-                        if conflict_resolution == "skip":
-                            print(f"Skipping {file} (already exists)")
-                            pbar.update(1)
-                            continue
-                        elif conflict_resolution == "rename":
-                            base, ext = os.path.splitext(file)
-                            target_path = os.path.join(target_folder, f"{base}_copy{ext}")
-                        elif conflict_resolution == "overwrite":
-                            os.remove(target_path)
-                    os.rename(source_path, target_path)
-                    undo_log.append({"source": source_path, "target": target_path})
-                pbar.update(1)
+                    result = False
+                break
+            path = parent
+            st = os.stat(path)
+            if st.st_dev != device:
+                break  # Crossed a mount point
+        case_insensitive_devices[device] = result
+    return case_insensitive_devices[device]
 
 
-def organize_photos_videos_by_type_and_date(folder, dry_run, conflict_resolution,
-                                            manual_naming_photos=False, manual_naming_videos=False):
-    """
-    Organizes both photo and video files in a given folder into subfolders based on their file type and modification date.
-    A progress bar is updated for each file encountered.
-    """
-    total_files = count_files(folder)
-    photo_custom_names = {}
-    video_custom_names = {}
-    with tqdm(total=total_files, desc="Moving files", unit="file") as pbar:
-        for root, _, files in os.walk(folder):
-            for file in files:
-                file_extension = os.path.splitext(file)[1].lower()
-                source_path = os.path.join(root, file)
-
-                # Process Image Files
-                if file_extension in categories["Image Files"]:
-                    category = "Image Files"
-                    try:
-                        mtime = os.path.getmtime(source_path)
-                    except OSError:
-                        print(f"Could not get modification time for {file}. Skipping.")
-                        pbar.update(1)
-                        continue
-                    default_date_str = time.strftime("%Y-%m-%d", time.localtime(mtime))
-                    if manual_naming_photos:
-                        if default_date_str not in photo_custom_names:
-                            custom_name = input(
-                                f"Enter custom folder name for photos with date {default_date_str} (or press Enter to use default): "
-                            ).strip()
-                            photo_custom_names[default_date_str] = custom_name if custom_name else default_date_str
-                        chosen_date_folder = photo_custom_names[default_date_str]
-                    else:
-                        chosen_date_folder = default_date_str
+class TargetIndex:
+    """
+    In-run cache of target folders: which ones have been created and which file names are taken.
+    Names in a folder are checked with lstat until probe_limit lookups, then the folder is listed
+    once and checked with set lookups. Safe to share between worker threads.
+    """
 
-                    target_folder = os.path.join(folder, category, chosen_date_folder)
-                    if dry_run:
-                        print(f"[DRY RUN] {file} -> {target_folder}")
-                    else:
-                        os.makedirs(target_folder, exist_ok=True)
-                        target_path = os.path.join(target_folder, file)
-                        if os.path.exists(target_path):
-                            if conflict_resolution == "skip":
-                                print(f"Skipping {file} (already exists)")
-                                pbar.update(1)
-                                continue
-                            elif conflict_resolution == "rename":
-                                base, ext = os.path.splitext(file)
-                                target_path = os.path.join(target_folder, f"{base}_copy{ext}")
-                            elif conflict_resolution == "overwrite":
-                                os.remove(target_path)
-                        os.rename(source_path, target_path)
-                        undo_log.append({"source": source_path, "target": target_path})
-
-                # Process Video Files
-                elif file_extension in categories["Video Files"]:
-                    category = "Video Files"
-                    try:
-                        mtime = os.path.getmtime(source_path)
-                    except OSError:
-                        print(f"Could not get modification time for {file}. Skipping.")
-                        pbar.update(1)
-                        continue
-                    default_date_str = time.strftime("%Y-%m-%d", time.localtime(mtime))
-                    if manual_naming_videos:
-                        if default_date_str not in video_custom_names:
-                            custom_name = input(
-                                f"Enter custom folder name for videos with date {default_date_str} (or press Enter to use default): "
-                            ).strip()
-                            video_custom_names[default_date_str] = custom_name if custom_name else default_date_str
-                        chosen_date_folder = video_custom_names[default_date_str]
-                    else:
-                        chosen_date_folder = default_date_str
+    probe_limit = 64
 
-                    target_folder = os.path.join(folder, category, chosen_date_folder)
-                    if dry_run:
-                        print(f"[DRY RUN] {file} -> {target_folder}")
-                    else:
-                        os.makedirs(target_folder, exist_ok=True)
-                        target_path = os.path.join(target_folder, file)
-                        if os.path.exists(target_path):
-                            if conflict_resolution == "skip":
-                                print(f"Skipping {file} (already exists)")
-                                pbar.update(1)
-                                continue
-                            elif conflict_resolution == "rename":
-                                base, ext = os.path.splitext(file)
-                                target_path = os.path.join(target_folder, f"{base}_copy{ext}")
-                            elif conflict_resolution == "overwrite":
-                                os.remove(target_path)
-                        os.rename(source_path, target_path)
-                        undo_log.append({"source": source_path, "target": target_path})
-                # Skip files that are not photos or videos.
-                pbar.update(1)
-
-
-def organize_photos_by_type_and_date(folder, dry_run, conflict_resolution, manual_naming_photos=False):
-    """
-    Organizes only photo files in a given folder into subfolders based on modification date.
-    A progress bar is updated for each file encountered.
-    """
-    total_files = count_files(folder)
-    photo_custom_names = {}
-    with tqdm(total=total_files, desc="Moving files", unit="file") as pbar:
-        for root, _, files in os.walk(folder):
-            for file in files:
-                file_extension = os.path.splitext(file)[1].lower()
-                if file_extension not in categories["Image Files"]:
-                    pbar.update(1)
-                    continue  # Process only photos
-                source_path = os.path.join(root, file)
-                try:
-                    mtime = os.path.getmtime(source_path)
-                except OSError:
-                    print(f"Could not get modification time for {file}. Skipping.")
-                    pbar.update(1)
-                    continue
-                default_date_str = time.strftime("%Y-%m-%d", time.localtime(mtime))
-                if manual_naming_photos:
-                    if default_date_str not in photo_custom_names:
-                        custom_name = input(
-                            f"Enter custom folder name for photos with date {default_date_str} (or press Enter to use default): "
-                        ).strip()
-                        photo_custom_names[default_date_str] = custom_name if custom_name else default_date_str
-                    chosen_date_folder = photo_custom_names[default_date_str]
-                else:
-                    chosen_date_folder = default_date_str
+    def __init__(self, listed=None):
+        self._listed = listed if listed is not None else {}  # Target folder -> name keys on disk when listed
+        self._claimed = {}  # Target folder -> name keys taken by moves in this run
+        self._probes = {}  # Target folder -> lstat probes so far, while not listed
+        self._fold = {}  # Target folder -> True if names are compared case-insensitively
+        self._next_suffix = {}  # (target folder, name key) -> next "_N" suffix to try
+        self._created = set()
+        self._lock = threading.Lock()
 
-                target_folder = os.path.join(folder, "Image Files", chosen_date_folder)
-                if dry_run:
-                    print(f"[DRY RUN] {file} -> {target_folder}")
-                else:
-                    os.makedirs(target_folder, exist_ok=True)
-                    target_path = os.path.join(target_folder, file)
-                    if os.path.exists(target_path):
-                        if conflict_resolution == "skip":
-                            print(f"Skipping {file} (already exists)")
-                            pbar.update(1)
-                            continue
-                        elif conflict_resolution == "rename":
-                            base, ext = os.path.splitext(file)
-                            target_path = os.path.join(target_folder, f"{base}_copy{ext}")
-                        elif conflict_resolution == "overwrite":
-                            os.remove(target_path)
-                    os.rename(source_path, target_path)
-                    undo_log.append({"source": source_path, "target": target_path})
-                pbar.update(1)
-
-
-def organize_videos_by_type_and_date(folder, dry_run, conflict_resolution, manual_naming_videos=False):
-    """
-    Organizes only video files in a given folder into subfolders based on modification date.
-    A progress bar is updated for each file encountered.
-    """
-    total_files = count_files(folder)
-    video_custom_names = {}
-    with tqdm(total=total_files, desc="Moving files", unit="file") as pbar:
-        for root, _, files in os.walk(folder):
-            for file in files:
-                file_extension = os.path.splitext(file)[1].lower()
-                if file_extension not in categories["Video Files"]:
-                    pbar.update(1)
-                    continue  # Process only videos
-                source_path = os.path.join(root, file)
+    def for_execution(self):
+        """
+        Returns a new index for executing the plan this one was built for: the folder
+        listings are reused, the names claimed while planning are not.
+        """
+        with self._lock:
+            index = TargetIndex(self._listed)
+            index._fold = dict(self._fold)
+            index._created = set(self._created)
+        return index
+
+    def _key(self, folder, name):
+        fold = self._fold.get(folder)
+        if fold is None:
+            fold = self._fold[folder] = is_case_insensitive(folder)
+        return name.casefold() if fold else name
+
+    def _taken(self, folder, name):
+        key = self._key(folder, name)
+        if key in self._claimed.get(folder, ()):
+            return True
+        listed = self._listed.get(folder)
+        if listed is None:
+            probes = self._probes.get(folder, 0)
+            if probes < self.probe_limit:
+                self._probes[folder] = probes + 1
+                start = profiler.start()
                 try:
-                    mtime = os.path.getmtime(source_path)
-                except OSError:
-                    print(f"Could not get modification time for {file}. Skipping.")
-                    pbar.update(1)
-                    continue
-                default_date_str = time.strftime("%Y-%m-%d", time.localtime(mtime))
-                if manual_naming_videos:
-                    if default_date_str not in video_custom_names:
-                        custom_name = input(
-                            f"Enter custom folder name for videos with date {default_date_str} (or press Enter to use default): "
-                        ).strip()
-                        video_custom_names[default_date_str] = custom_name if custom_name else default_date_str
-                    chosen_date_folder = video_custom_names[default_date_str]
-                else:
-                    chosen_date_folder = default_date_str
+                    os.lstat(os.path.join(folder, name))
+                    return True
+                except (FileNotFoundError, NotADirectoryError):
+                    return False
+                finally:
+                    profiler.stop("lstat", start, folder)
+            start = profiler.start()
+            try:
+                listed = {self._key(folder, entry) for entry in os.listdir(folder)}
+                self._created.add(folder)
+            except OSError:
+                listed = set()  # Folder does not exist yet
+            profiler.stop("listdir", start, folder)
+            self._listed[folder] = listed
+        return key in listed
 
-                target_folder = os.path.join(folder, "Video Files", chosen_date_folder)
-                if dry_run:
-                    print(f"[DRY RUN] {file} -> {target_folder}")
-                else:
-                    os.makedirs(target_folder, exist_ok=True)
-                    target_path = os.path.join(target_folder, file)
-                    if os.path.exists(target_path):
-                        if conflict_resolution == "skip":
-                            print(f"Skipping {file} (already exists)")
-                            pbar.update(1)
-                            continue
-                        elif conflict_resolution == "rename":
-                            base, ext = os.path.splitext(file)
-                            target_path = os.path.join(target_folder, f"{base}_copy{ext}")
-                        elif conflict_resolution == "overwrite":
-                            os.remove(target_path)
-                    os.rename(source_path, target_path)
-                    undo_log.append({"source": source_path, "target": target_path})
-                pbar.update(1)
+    def ensure_folder(self, folder):
+        with self._lock:
+            if folder in self._created:
+                return
+            start = profiler.start()
+            os.makedirs(folder, exist_ok=True)
+            profiler.stop("makedirs", start, folder)
+            self._created.add(folder)
+
+    def exists(self, path):
+        folder, name = os.path.split(path)
+        with self._lock:
+            return self._taken(folder, name)
 
+    def claim(self, path):
+        folder, name = os.path.split(path)
+        with self._lock:
+            self._claimed.setdefault(folder, set()).add(self._key(folder, name))
 
-def undo_last_operation():
+    def allocate(self, path):
+        """
+        Claims and returns the first free "{base}_{n}{ext}" variant of path (n = 1, 2, ...).
+        The next suffix to try is remembered per name, and the check and claim happen under
+        one lock, so concurrent callers never get the same name.
+        """
+        folder, name = os.path.split(path)
+        base, ext = os.path.splitext(name)
+        with self._lock:
+            suffix_key = (folder, self._key(folder, name))
+            n = self._next_suffix.get(suffix_key, 1)
+            while self._taken(folder, f"{base}_{n}{ext}"):
+                n += 1
+            self._next_suffix[suffix_key] = n + 1
+            candidate = f"{base}_{n}{ext}"
+            self._claimed.setdefault(folder, set()).add(self._key(folder, candidate))
+        return os.path.join(folder, candidate)
+
+
+def resolve_skip(source_path, target_path, index):
     """
-    Reverses the file moves recorded in the undo_log.
+    Conflict resolver: leaves the source file where it is.
     """
-    if not undo_log:
-        print("No operations to undo.")
-        return
-    # Process in reverse order to undo moves correctly
-    for move in reversed(undo_log):
-        source = move["source"]
-        target = move["target"]
-        if os.path.exists(target):
-            os.rename(target, source)
-            print(f"Restored {target} to {source}")
-        else:
-            print(f"File {target} not found; skipping undo for this file.")
-    undo_log.clear()
-    notify_user("operation_completed")
+    event_log.emit("skipped", source_path, target_path)
+    return None
 
 
-def multi_folder_support(dry_run, conflict_resolution):
+def resolve_rename(source_path, target_path, index):
     """
-    Organizes files in multiple folders.
-    Prompts the user to enter comma-separated folder paths and processes each folder.
+    Conflict resolver: moves the file under the first free "_1", "_2", ... name instead
+    (see TargetIndex.allocate).
     """
-    folders_input = input("Enter the folder paths to organize (separated by commas): ").strip()
-    folders = [folder.strip() for folder in folders_input.split(",") if folder.strip()]
-    for folder in folders:
-        if not os.path.isdir(folder):
-            print(f"Folder '{folder}' is invalid. Skipping.")
-            continue
-        if dry_run:
-            print(f"[DRY RUN] Preview organization for folder: {folder}")
+    if index is None:
+        index = TargetIndex()
+    return index.allocate(target_path)
+
+
+def resolve_overwrite(source_path, target_path, index):
+    """
+    Conflict resolver: replaces the existing target file.
+    """
+    os.remove(target_path)
+    return target_path
+
+
+# In-run cache of content hashes: (device, inode, size, mtime_ns, partial) -> digest
+hash_cache = {}
+hash_cache_lock = threading.Lock()
+
+
+def hash_file_contents(path, size, partial, edge_bytes=1 << 12, chunk_size=1 << 20):
+    """
+    Returns a BLAKE2b digest of the file: of its first and last edge_bytes when partial is True,
+    otherwise of the whole file, streamed in chunks.
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        if partial:
+            hasher.update(f.read(edge_bytes))
+            if size > edge_bytes:
+                f.seek(max(edge_bytes, size - edge_bytes))
+                hasher.update(f.read(edge_bytes))
         else:
-            print(f"Organizing folder: {folder}")
-        organize_files_by_type(folder, dry_run, conflict_resolution)
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                hasher.update(chunk)
+    return hasher.digest()
 
 
-def restore_point_update_file_types():
+def file_hash(path, st, partial, edge_bytes=1 << 12, chunk_size=1 << 20):
     """
-    Presents a submenu for creating a restore point or updating file type categories.
+    Cached hash_file_contents for a file with stat result st, so a file that collides
+    with many others is only hashed once per run.
     """
-    print("1. Create Restore Point")
-    print("2. Update File Types")
-    sub_choice = input("Enter your choice: ").strip()
-    if sub_choice == "1":
-        folder = input("Enter the folder path to create a restore point: ").strip()
-        if not os.path.isdir(folder):
-            notify_user("invalid_input")
-            return
-        file_list = []
-        for root, _, files in os.walk(folder):
-            for file in files:
-                file_path = os.path.join(root, file)
-                file_list.append(file_path)
-        restore_point = {
-            "folder": folder,
-            "files": file_list,
-            "timestamp": time.ctime()
-        }
-        with open("restore_point.json", "w", encoding="utf-8") as f:
-            json.dump(restore_point, f, indent=4)
-        print("Restore point created and saved to 'restore_point.json'.")
-    elif sub_choice == "2":
-        print("Current categories and their extensions:")
-        for cat, exts in categories.items():
-            print(f"{cat}: {', '.join(exts)}")
-        print("1. Add Category")
+    key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, partial)
+    with hash_cache_lock:
+        digest = hash_cache.get(key)
+    if digest is not None:
+        return digest
+    digest = hash_file_contents(path, st.st_size, partial, edge_bytes, chunk_size)
+    with hash_cache_lock:
+        hash_cache[key] = digest
+    return digest
+
+
+def files_identical(path_a, path_b, edge_bytes=1 << 12):
+    """
+    Compares two files in stages, stopping as soon as they differ:
+    size, then a hash of the first and last few KB, then a full streamed hash.
+    """
+    st_a = os.stat(path_a)
+    st_b = os.stat(path_b)
+    if st_a.st_size != st_b.st_size:
+        return False
+    if (st_a.st_dev, st_a.st_ino) == (st_b.st_dev, st_b.st_ino):
+        return True  # Same file (hard link)
+    if file_hash(path_a, st_a, True, edge_bytes) != file_hash(path_b, st_b, True, edge_bytes):
+        return False
+    if st_a.st_size <= 2 * edge_bytes:
+        return True  # The partial hashes already covered every byte
+    return file_hash(path_a, st_a, False) == file_hash(path_b, st_b, False)
+
+
+def resolve_dedupe(source_path, target_path, index):
+    """
+    Conflict resolver: drops the source when its content is identical to the existing target
+    (recorded in the undo journal, which restores it by copying the target back),
+    otherwise moves it under a numbered name like rename.
+    """
+    if files_identical(source_path, target_path):
+        os.remove(source_path)
+        undo_journal.record_dedupe(source_path, target_path)
+        event_log.emit("deduplicated", source_path, target_path)
+        return None
+    return resolve_rename(source_path, target_path, index)
+
+
+# Conflict resolution mode -> resolver(source_path, target_path, index) returning the path to move to, or None to skip
+conflict_resolvers = {
+    "skip": resolve_skip,
+    "rename": resolve_rename,
+    "overwrite": resolve_overwrite,
+    "dedupe": resolve_dedupe
+}
+
+
+# Totals for moves that had to copy across filesystems, reported by report_cross_device_moves
+cross_device_stats = {"files": 0, "bytes": 0, "seconds": 0.0}
+cross_device_lock = threading.Lock()
+
+
+def copy_file_data(src, dst, size, buffer_size=1 << 20):
+    """
+    Copies size bytes between two open binary files, in the kernel where possible:
+    copy_file_range first, then sendfile, then a large reusable buffer.
+    """
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    copied = 0
+    for kernel_copy in ("copy_file_range", "sendfile"):
+        if not hasattr(os, kernel_copy):
+            continue
+        try:
+            while copied < size:
+                if kernel_copy == "copy_file_range":
+                    sent = os.copy_file_range(src_fd, dst_fd, min(size - copied, 1 << 30))
+                else:
+                    sent = os.sendfile(dst_fd, src_fd, copied, min(size - copied, 1 << 30))
+                if sent == 0:
+                    break  # Source got shorter
+                copied += sent
+            return copied
+        except OSError as e:
+            if copied or e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP):
+                raise
+            # Not supported for this pair of files; try the next method
+    buffer = memoryview(bytearray(buffer_size))
+    while True:
+        read = src.readinto(buffer)
+        if not read:
+            return copied
+        dst.write(buffer[:read])
+        copied += read
+
+
+def fsync_directory(folder):
+    """
+    Makes new directory entries in folder durable. Skipped where directories cannot be
+    opened or fsynced (Windows, some network filesystems); there the rename is all we get.
+    """
+    if os.name == "nt":
+        return
+    folder_fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(folder_fd)
+    except OSError as e:
+        if e.errno not in (errno.EINVAL, errno.ENOTSUP, errno.EBADF):
+            raise
+    finally:
+        os.close(folder_fd)
+
+
+def copy_across_devices(source_path, target_path, verify=False):
+    """
+    Moves a file to another filesystem: copies it to a temporary name next to the target,
+    copies permissions and timestamps, optionally checks the copy's hash against the source,
+    fsyncs it, renames it into place and only then removes the source.
+    The temporary name is unique per attempt, so leftovers from a crashed run never block a move
+    and only this attempt's own file is cleaned up on failure.
+    """
+    start = time.perf_counter()
+    temp_path = os.path.join(os.path.dirname(target_path),
+                             f".{os.path.basename(target_path)}.{os.getpid()}.{uuid.uuid4().hex[:8]}.partial")
+    created = False
+    try:
+        with open(source_path, "rb") as src, open(temp_path, "xb") as dst:
+            created = True
+            size = os.fstat(src.fileno()).st_size
+            copied = copy_file_data(src, dst, size)
+            if copied != size:
+                raise OSError(errno.EIO, f"Short copy ({copied} of {size} bytes)", source_path)
+            dst.flush()
+            os.fsync(dst.fileno())
+        shutil.copystat(source_path, temp_path)
+        if verify and hash_file_contents(source_path, size, False) != hash_file_contents(temp_path, size, False):
+            raise OSError(errno.EIO, "Copy does not match the source", source_path)
+        os.replace(temp_path, target_path)
+    except BaseException:
+        if created:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+        raise
+    fsync_directory(os.path.dirname(target_path) or ".")
+    os.remove(source_path)
+    with cross_device_lock:
+        cross_device_stats["files"] += 1
+        cross_device_stats["bytes"] += size
+        cross_device_stats["seconds"] += time.perf_counter() - start
+
+
+def move_file(source_path, target_path):
+    """
+    Moves a file with os.rename, falling back to copy_across_devices when the target
+    is on another filesystem (EXDEV).
+    """
+    start = profiler.start()
+    try:
+        os.rename(source_path, target_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        copy_across_devices(source_path, target_path, settings["verify_copies"])
+        profiler.stop("copy", start, os.path.dirname(target_path))
+    else:
+        profiler.stop("rename", start, os.path.dirname(target_path))
+
+
+def report_cross_device_moves():
+    """
+    Prints and resets the totals for files copied across filesystems since the last report.
+    Returns the totals, or None when nothing was copied.
+    """
+    with cross_device_lock:
+        stats = dict(cross_device_stats)
+        cross_device_stats.update(files=0, bytes=0, seconds=0.0)
+    if not stats["files"]:
+        return None
+    megabytes = stats["bytes"] / (1 << 20)
+    stats["seconds"] = round(stats["seconds"], 3)
+    stats["mb_per_second"] = round(megabytes / stats["seconds"], 1) if stats["seconds"] else None
+    print(f"Copied {stats['files']} files ({megabytes:.1f} MB) to another filesystem"
+          f" at {stats['mb_per_second']} MB/s.")
+    return stats
+
+
+def execute_move(source_path, target_path, conflict_resolution, index=None):
+    """
+    Moves a single file, applying the conflict resolver when the target already exists.
+    With a TargetIndex the existence check and target folder creation come from the in-run cache,
+    leaving a single rename syscall per file in the common case.
+    A source that was moved or deleted since the move was planned is skipped as well.
+    Returns the final target path, or None if the file was skipped.
+    """
+    if index is None:
+        target_exists = os.path.exists(target_path)
+    else:
+        index.ensure_folder(os.path.dirname(target_path))
+        target_exists = index.exists(target_path)
+    try:
+        if target_exists and conflict_resolution in conflict_resolvers:
+            start = profiler.start()
+            target_path = conflict_resolvers[conflict_resolution](source_path, target_path, index)
+            profiler.stop("resolve_" + conflict_resolution, start)
+            if target_path is None:
+                return None
+        move_file(source_path, target_path)
+    except FileNotFoundError:
+        # Only checked on failure, so the common case stays a single rename
+        if os.path.lexists(source_path):
+            raise
+        event_log.emit("source_missing", source_path, target_path)
+        return None
+    if index is not None:
+        index.claim(target_path)
+    undo_journal.record_move(source_path, target_path)
+    event_log.emit("moved", source_path, target_path)
+    return target_path
+
+
+numbered_suffix = re.compile(r"_\d+$")
+
+
+def collision_key(target_path):
+    """
+    Returns the key under which moves may collide: the target folder plus the file name
+    with any "_N" suffix removed, since rename mode turns "a.txt" into "a_1.txt".
+    """
+    target_folder, file = os.path.split(target_path)
+    base, ext = os.path.splitext(file)
+    return target_folder, numbered_suffix.sub("", base) + ext
+
+
+def execute_moves_parallel(moves, conflict_resolution, workers, pbar, index=None):
+    """
+    Executes planned (source_path, target_path) moves on a bounded thread pool.
+    Moves that may collide on a target name run in order inside the same task,
+    so skip/rename/overwrite behave exactly as in a sequential run.
+    The progress bar is advanced from the calling thread as tasks complete.
+    index is an optional TargetIndex to use instead of a new one.
+    Returns the number of files moved.
+    """
+    groups = {}
+    for source_path, target_path in moves:
+        target_folder, name = collision_key(target_path)
+        # Names differing only in case collide on case-insensitive filesystems
+        groups.setdefault((target_folder, name.casefold()), []).append((source_path, target_path))
+    if index is None:
+        index = TargetIndex()
+    for target_folder in {os.path.dirname(target_path) for _, target_path in moves}:
+        index.ensure_folder(target_folder)
+
+    def run_group(group):
+        moved = 0
+        for source_path, target_path in group:
+            if execute_move(source_path, target_path, conflict_resolution, index):
+                moved += 1
+        return len(group), moved
+
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    moved = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_group, group) for group in groups.values()]
+        for future in as_completed(futures):
+            done, group_moved = future.result()
+            moved += group_moved
+            pbar.update(done)
+    return moved
+
+
+# One planned move: absolute source and target paths, the category, the date bucket
+# (None when not sorting by date) and the conflict decision predicted at planning time
+# ("move" when the target name is free, otherwise the conflict resolution that will apply).
+PlannedMove = namedtuple("PlannedMove", ["source", "target", "category", "date", "decision"])
+
+
+class MovePlan:
+    """
+    A reviewable list of planned moves for one folder.
+    Plans are saved as gzip-compressed JSON lines with paths relative to the folder,
+    so a dry run on a huge tree can be executed later without rescanning or reclassifying.
+    """
+
+    def __init__(self, folder, conflict_resolution, moves=None):
+        # Absolute, so a saved plan can be applied from any working directory
+        self.folder = os.path.abspath(folder)
+        self.conflict_resolution = conflict_resolution
+        self.moves = moves if moves is not None else []
+        self.index = None  # TargetIndex used for planning, reused when the plan runs right away
+
+    def save(self, path):
+        """
+        Writes the plan to the given file.
+        """
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            header = {"folder": self.folder, "conflict_resolution": self.conflict_resolution,
+                      "timestamp": time.ctime(), "count": len(self.moves)}
+            f.write(json.dumps(header) + "\n")
+            for move in self.moves:
+                record = [os.path.relpath(move.source, self.folder), os.path.relpath(move.target, self.folder),
+                          move.category, move.date, move.decision]
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a plan written by save().
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            folder = header["folder"]
+            moves = []
+            for line in f:
+                source, target, category, date_str, decision = json.loads(line)
+                moves.append(PlannedMove(os.path.join(folder, source), os.path.join(folder, target),
+                                         category, date_str, decision))
+        return cls(folder, header["conflict_resolution"], moves)
+
+
+def organized_folders(folder):
+    """
+    Returns the category folders directly under the given folder that organizers move files into.
+    """
+    rule_categories = rule_matcher.categories if rule_matcher is not None else []
+    return {os.path.join(folder, category) for category in list(categories) + rule_categories + ["Other Files"]}
+
+
+def scan_source_files(folder, scan_state=None):
+    """
+    Scans the folder for files that still need organizing: the category folders (and the
+    date folders inside them) and directories matching settings["exclude_globs"] are pruned,
+    so traversal cost tracks the unorganized files only.
+    """
+    return scan_files(folder, prune=organized_folders(folder), state=scan_state,
+                      exclude=compile_exclude_globs(settings["exclude_globs"]))
+
+
+class MetadataCache:
+    """
+    Persistent cache of per-file results (media capture dates, sniffed content types) keyed by
+    (inode, size, mtime_ns), stored in an SQLite table so lookups stay cheap on multi-million-file
+    archives without loading everything into memory.
+    Unchanged files (including files that were only moved) are never parsed twice.
+    New results are written in batches.
+    """
+
+    def __init__(self, path, batch_size=1000, table="capture_dates", column="date"):
+        self.path = path
+        self.batch_size = batch_size
+        self.table = table
+        self.column = column
+        self._db = None
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._db is None:
+            import sqlite3
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (inode INTEGER, size INTEGER, "
+                             f"mtime_ns INTEGER, {self.column} TEXT, PRIMARY KEY (inode, size, mtime_ns)) WITHOUT ROWID")
+        return self._db
+
+    def get(self, key):
+        """
+        Returns (found, value) for a (inode, size, mtime_ns) key; value may be None when found.
+        """
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT {self.column} FROM {self.table} WHERE inode = ? AND size = ? AND mtime_ns = ?", key).fetchone()
+        return (row is not None), (row[0] if row is not None else None)
+
+    def put(self, key, value):
+        with self._lock:
+            self._pending.append(key + (value,))
+            if len(self._pending) >= self.batch_size:
+                self._write()
+
+    def flush(self):
+        with self._lock:
+            self._write()
+
+    def _write(self):
+        if not self._pending:
+            return
+        db = self._connect()
+        db.executemany(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)", self._pending)
+        db.commit()
+        self._pending.clear()
+
+
+def exif_date(tiff):
+    """
+    Returns the capture date (YYYY-MM-DD) from a TIFF/EXIF block, preferring DateTimeOriginal
+    over the IFD0 DateTime, or None. Every offset is bounds-checked against the bytes read.
+    """
+    if tiff[:2] == b"II":
+        order = "<"
+    elif tiff[:2] == b"MM":
+        order = ">"
+    else:
+        return None
+
+    def read_ifd(offset):
+        if offset + 2 > len(tiff):
+            return {}
+        (count,) = struct.unpack_from(order + "H", tiff, offset)
+        tags = {}
+        for i in range(count):
+            entry_offset = offset + 2 + i * 12
+            if entry_offset + 12 > len(tiff):
+                break
+            tag, value_type, value_count, value = struct.unpack_from(order + "HHII", tiff, entry_offset)
+            tags[tag] = (value_type, value_count, value)
+        return tags
+
+    def read_date(tag_value):
+        value_type, value_count, value_offset = tag_value
+        if value_type != 2 or value_count < 10 or value_offset + 10 > len(tiff):
+            return None  # Not an ASCII "YYYY:MM:DD ..." value inside the bytes read
+        text = tiff[value_offset:value_offset + 10].decode("ascii", "replace")
+        if not (text[:4].isdigit() and text[5:7].isdigit() and text[8:10].isdigit()) or text.startswith("0000"):
+            return None
+        return f"{text[:4]}-{text[5:7]}-{text[8:10]}"
+
+    ifd0 = read_ifd(struct.unpack_from(order + "I", tiff, 4)[0])
+    if 0x8769 in ifd0:  # Exif sub-IFD pointer
+        exif_ifd = read_ifd(ifd0[0x8769][2])
+        for tag in (0x9003, 0x9004):  # DateTimeOriginal, DateTimeDigitized
+            if tag in exif_ifd:
+                date_str = read_date(exif_ifd[tag])
+                if date_str:
+                    return date_str
+    if 0x0132 in ifd0:  # DateTime
+        return read_date(ifd0[0x0132])
+    return None
+
+
+def read_jpeg_capture_date(path, limit=1 << 16):
+    """
+    Reads at most limit bytes from the start of a JPEG and returns its EXIF capture date, or None.
+    """
+    with open(path, "rb") as f:
+        data = f.read(limit)
+    if data[:2] != b"\xff\xd8":
+        return None
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1  # Fill byte
+            continue
+        if marker in (0xD9, 0xDA):
+            return None  # End of image / start of scan: no EXIF before the image data
+        (length,) = struct.unpack_from(">H", data, pos + 2)
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b"Exif\0\0":
+            return exif_date(data[pos + 10:pos + 2 + length])
+        pos += 2 + length
+    return None
+
+
+def read_tiff_capture_date(path, limit=1 << 16):
+    """
+    Reads at most limit bytes from the start of a TIFF and returns its capture date, or None.
+    """
+    with open(path, "rb") as f:
+        return exif_date(f.read(limit))
+
+
+def read_mp4_capture_date(path):
+    """
+    Returns the creation date from the movie header (moov/mvhd) of an MP4/MOV file, or None.
+    Only box headers are read while skipping through the file, so a moov at the end costs a few seeks.
+    """
+    with open(path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+
+        def box_header(pos):
+            f.seek(pos)
+            header = f.read(16)
+            if len(header) < 8:
+                return None, None, 0
+            size, kind = struct.unpack_from(">I4s", header)
+            header_size = 8
+            if size == 1 and len(header) == 16:
+                (size,) = struct.unpack_from(">Q", header, 8)
+                header_size = 16
+            elif size == 0:
+                size = file_size - pos
+            return size, kind, header_size
+
+        pos = 0
+        while pos + 8 <= file_size:
+            size, kind, header_size = box_header(pos)
+            if size is None or size < header_size:
+                return None
+            if kind == b"moov":
+                child, end = pos + header_size, pos + size
+                while child + 8 <= end:
+                    child_size, child_kind, child_header = box_header(child)
+                    if child_size is None or child_size < child_header:
+                        return None
+                    if child_kind == b"mvhd":
+                        f.seek(child + child_header)
+                        body = f.read(12)
+                        if len(body) < 8:
+                            return None
+                        if body[0] == 1 and len(body) == 12:
+                            (created,) = struct.unpack_from(">Q", body, 4)
+                        else:
+                            (created,) = struct.unpack_from(">I", body, 4)
+                        if created == 0:
+                            return None
+                        # mvhd times count seconds since 1904-01-01 UTC
+                        return time.strftime("%Y-%m-%d", time.localtime(created - 2082844800))
+                    child += child_size
+                return None
+            pos += size
+    return None
+
+
+# File extension -> capture date reader
+capture_date_readers = {
+    ".jpg": read_jpeg_capture_date,
+    ".jpeg": read_jpeg_capture_date,
+    ".tif": read_tiff_capture_date,
+    ".tiff": read_tiff_capture_date,
+    ".mp4": read_mp4_capture_date,
+    ".m4v": read_mp4_capture_date,
+    ".mov": read_mp4_capture_date,
+    ".3gp": read_mp4_capture_date
+}
+
+# Global capture date cache shared across runs
+metadata_cache = MetadataCache(settings["metadata_cache"])
+atexit.register(metadata_cache.flush)
+
+
+# Content sniffing for files whose name does not give a category (see sniff_content_type).
+# Magic numbers: (offset, bytes, category); the first match wins.
+magic_signatures = [
+    (0, b"\x89PNG\r\n\x1a\n", "Image Files"),
+    (0, b"\xff\xd8\xff", "Image Files"),
+    (0, b"GIF87a", "Image Files"),
+    (0, b"GIF89a", "Image Files"),
+    (0, b"II*\x00", "Image Files"),
+    (0, b"MM\x00*", "Image Files"),
+    (0, b"%PDF-", "Document Files"),
+    (0, b"Rar!\x1a\x07", "Compressed Files"),
+    (0, b"7z\xbc\xaf\x27\x1c", "Compressed Files"),
+    (0, b"\x1f\x8b", "Compressed Files"),
+    (0, b"BZh", "Compressed Files"),
+    (0, b"\xfd7zXZ\x00", "Compressed Files"),
+    (0, b"\x28\xb5\x2f\xfd", "Compressed Files"),  # zstd
+    (257, b"ustar", "Compressed Files"),
+    (0, b"\x1a\x45\xdf\xa3", "Video Files"),  # Matroska / WebM
+    (0, b"ID3", "Audio Files"),
+    (0, b"fLaC", "Audio Files"),
+    (0, b"OggS", "Audio Files"),
+    (0, b"\xff\xfb", "Audio Files"),  # MPEG audio frame
+    (0, b"\x7fELF", "Executable Files"),
+    (0, b"MZ", "Executable Files"),
+    (0, b"\xcf\xfa\xed\xfe", "Executable Files"),  # Mach-O
+    (0, b"#!", "Executable Files"),
+    (0, b"SQLite format 3\x00", "Database Files"),
+]
+
+# RIFF form type -> category
+riff_types = {b"WEBP": "Image Files", b"AVI ": "Video Files", b"WAVE": "Audio Files"}
+
+# ISO base media (ftyp) major brand -> category, for brands that are not video
+ftyp_brands = {b"M4A ": "Audio Files", b"M4B ": "Audio Files", b"M4P ": "Audio Files",
+               # HEIF/HEIC and AVIF photos (single images and image sequences), Canon CR3 raw
+               b"heic": "Image Files", b"heix": "Image Files", b"heim": "Image Files", b"heis": "Image Files",
+               b"hevc": "Image Files", b"hevx": "Image Files", b"mif1": "Image Files", b"msf1": "Image Files",
+               b"avif": "Image Files", b"avis": "Image Files", b"crx ": "Image Files"}
+
+# Global content type cache shared across runs (same database as the capture dates).
+# The table is versioned: v1 filed HEIF/AVIF photos under Video Files.
+content_type_cache = MetadataCache(settings["metadata_cache"], table="content_types_v2", column="category")
+atexit.register(content_type_cache.flush)
+
+# Sniffed categories (None when unknown) for the files being planned, path -> category
+# (see prefetch_content_types)
+sniffed_categories = {}
+
+
+def sniff_content_type(head):
+    """
+    Returns the category suggested by the first bytes of a file, or None.
+    """
+    if head[:4] == b"PK\x03\x04":
+        # Office documents are ZIP files whose first entry is usually [Content_Types].xml
+        return "Document Files" if b"[Content_Types].xml" in head else "Compressed Files"
+    if head[4:8] == b"ftyp":
+        return ftyp_brands.get(head[8:12], "Video Files")
+    if head[:4] == b"RIFF":
+        return riff_types.get(head[8:12])
+    if head[:2] == b"BM" and head[6:10] == b"\x00\x00\x00\x00" and len(head) >= 26:
+        return "Image Files"
+    for offset, magic, category in magic_signatures:
+        if head.startswith(magic, offset):
+            return category
+    return None
+
+
+def sniff_category(path, st, limit=512):
+    """
+    Returns the category of a file from its content (reading at most limit bytes), or None.
+    Results are looked up in / added to the persistent content type cache, and only
+    categories that currently exist are returned.
+    """
+    key = (st.st_ino, st.st_size, st.st_mtime_ns)
+    found, category = content_type_cache.get(key)
+    if not found:
+        start = profiler.start()
+        try:
+            with open(path, "rb") as f:
+                category = sniff_content_type(f.read(limit))
+        except OSError:
+            return None  # Not cached, it may be readable next time
+        profiler.stop("sniff", start, os.path.dirname(path))
+        content_type_cache.put(key, category)
+    return category if category in categories else None
+
+
+def prefetch_content_types(entries):
+    """
+    Sniffs the files among entries that classification would put in "Other Files", reading them
+    on a thread pool of settings["sniff_workers"] threads, and stores the results in
+    sniffed_categories for classify_entry. Returns the paths that were looked at.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    candidates = []
+    for entry in entries:
+        if classify_file(entry.name, entry.path, entry.stat) == "Other Files":
+            try:
+                candidates.append((entry.path, entry.stat()))
+            except OSError:
+                continue
+    if not candidates:
+        return []
+    with ThreadPoolExecutor(max_workers=settings["sniff_workers"]) as executor:
+        results = executor.map(lambda candidate: sniff_category(*candidate), candidates, chunksize=64)
+        for (path, _), category in zip(candidates, results):
+            sniffed_categories[path] = category
+    return [path for path, _ in candidates]
+
+
+def capture_date(entry):
+    """
+    Returns the capture date (YYYY-MM-DD) stored in a photo or video's metadata, or None.
+    Results are looked up in / added to the persistent metadata cache.
+    """
+    reader = capture_date_readers.get(os.path.splitext(entry.name)[1].lower())
+    if reader is None:
+        return None
+    st = entry.stat()
+    key = (st.st_ino, st.st_size, st.st_mtime_ns)
+    found, date_str = metadata_cache.get(key)
+    if not found:
+        start = profiler.start()
+        try:
+            date_str = reader(entry.path)
+        except (OSError, struct.error, ValueError, OverflowError):
+            date_str = None
+        profiler.stop("read_metadata", start, os.path.dirname(entry.path))
+        metadata_cache.put(key, date_str)
+    return date_str
+
+
+# Organizer pipeline stages. A run is: source -> classifier -> bucket -> conflict resolver -> executor.
+# source(folder, scan_state) yields DirEntry objects, classifier(entry) returns a category name
+# (or None to leave the file alone), bucket(entry, category) returns a subfolder name inside the
+# category (or None), conflict resolvers live in conflict_resolvers, and executor(plan, workers)
+# performs the moves. The menu options and commands are configurations of these stages.
+
+
+def classify_entry(entry):
+    """
+    Default classifier: the file's category from the classification rules and its extension,
+    or, with settings["sniff_content"] on, from its content when that gives none.
+    """
+    category = classify_file(entry.name, entry.path, entry.stat)
+    if category == "Other Files" and settings["sniff_content"]:
+        sniffed = sniffed_categories.pop(entry.path, "")
+        if sniffed == "":  # Not prefetched
+            try:
+                sniffed = sniff_category(entry.path, entry.stat())
+            except OSError:
+                sniffed = None
+        category = sniffed or category
+    return category
+
+
+def category_classifier(allowed_categories):
+    """
+    Returns a classifier that only keeps files whose category is in allowed_categories.
+    """
+    def classifier(entry):
+        category = classify_entry(entry)
+        return category if category in allowed_categories else None
+    return classifier
+
+
+def date_bucket(entry, category):
+    """
+    Buckets files by modification date (YYYY-MM-DD) using the DirEntry's cached stat.
+    """
+    return time.strftime("%Y-%m-%d", time.localtime(entry.stat().st_mtime))
+
+
+def capture_date_bucket(entry, category):
+    """
+    Buckets photos and videos by the capture date in their metadata (EXIF, MP4/MOV header),
+    falling back to the modification date when there is none.
+    """
+    return capture_date(entry) or date_bucket(entry, category)
+
+
+def manual_date_bucket(named_categories, base_bucket=date_bucket):
+    """
+    Returns a date bucket that asks once per (category, date) for a custom folder name
+    for the categories in named_categories; other categories use the plain date.
+    base_bucket computes the default date.
+    """
+    labels = {"Image Files": "photos", "Video Files": "videos"}
+    custom_names = {}
+
+    def bucket(entry, category):
+        default_date_str = base_bucket(entry, category)
+        if category not in named_categories:
+            return default_date_str
+        key = (category, default_date_str)
+        if key not in custom_names:
+            custom_name = input(
+                f"Enter custom folder name for {labels.get(category, category)} with date {default_date_str} "
+                f"(or press Enter to use default): "
+            ).strip()
+            custom_names[key] = custom_name if custom_name else default_date_str
+        return custom_names[key]
+    return bucket
+
+
+def plan_moves(folder, conflict_resolution, classifier=classify_entry, bucket=None, scan_state=None,
+               source=scan_source_files):
+    """
+    Runs the source, classifier and bucket stages over the folder without moving anything.
+    Files the classifier returns None for are left in place; files whose bucket cannot be
+    computed (e.g. unreadable mtime) are skipped.
+    Already-organized category folders are not traversed (see scan_source_files).
+    With a scan_state cache (see load_scan_state) only new or changed directories are listed;
+    the cache is updated in place.
+    Returns a MovePlan.
+    """
+    plan = MovePlan(folder, conflict_resolution)
+    index = plan.index = TargetIndex()  # Names already in the target folders or taken by earlier moves in this plan
+    with profiler.phase("scan"):
+        entries = source(folder, scan_state)
+    prefetched = []
+    if settings["sniff_content"]:
+        with profiler.phase("sniff"):
+            entries = list(entries)
+            prefetched = prefetch_content_types(entries)
+    with profiler.phase("classify"):
+        plan_entries(plan, entries, index, conflict_resolution, classifier, bucket)
+    for path in prefetched:
+        sniffed_categories.pop(path, None)  # Left over when the classifier did not ask for them
+    return plan
+
+
+def plan_entries(plan, entries, index, conflict_resolution, classifier, bucket):
+    """
+    The classify/bucket/conflict part of plan_moves: appends a PlannedMove to the plan for each entry.
+    """
+    folder = plan.folder
+    for entry in entries:
+        file = entry.name
+        start = profiler.start()
+        category = classifier(entry)
+        profiler.stop("classify", start)
+        if category is None:
+            continue
+        bucket_name = None
+        target_folder = os.path.join(folder, category)
+        if bucket is not None:
+            start = profiler.start()
+            try:
+                bucket_name = bucket(entry, category)
+            except OSError:
+                event_log.emit("unreadable", entry.path, category=category)
+                continue
+            profiler.stop("bucket", start)
+            if bucket_name:
+                target_folder = os.path.join(target_folder, bucket_name)
+        target_path = os.path.join(target_folder, file)
+        if index.exists(target_path):
+            decision = conflict_resolution
+            if decision == "rename":
+                index.allocate(target_path)  # Reserve the numbered name it will get
+        else:
+            decision = "move"
+            index.claim(target_path)
+        plan.moves.append(PlannedMove(entry.path, target_path, category, bucket_name, decision))
+
+
+def print_move_plan(plan):
+    """
+    Adds a dry-run preview of the plan to the event log, which reports it as counts
+    per category and target folder (see EventLog.report).
+    """
+    for move in plan.moves:
+        event_log.emit("planned", move.source, move.target, move.category, decision=move.decision)
+
+
+def execute_move_plan(plan, workers=1, pbar=None):
+    """
+    Executes a MovePlan. The conflict resolution is applied again against the live filesystem,
+    so a plan that was saved earlier stays safe to run.
+    With workers > 1 the moves run on a thread pool of that size.
+    pbar is an optional shared progress bar; by default a new one is shown.
+    Returns the number of files moved.
+    """
+    if pbar is None:
+        with progress_bar(len(plan.moves)) as pbar:
+            return execute_move_plan(plan, workers, pbar)
+    # Straight after planning, the target folders need not be looked at again
+    index = plan.index.for_execution() if plan.index is not None else TargetIndex()
+    if workers > 1:
+        moves = [(move.source, move.target) for move in plan.moves]
+        return execute_moves_parallel(moves, plan.conflict_resolution, workers, pbar, index)
+    moved = 0
+    for move in plan.moves:
+        if execute_move(move.source, move.target, plan.conflict_resolution, index):
+            moved += 1
+        pbar.update(1)
+    return moved
+
+
+def organize_files(folder, dry_run, conflict_resolution, mode="type", classifier=classify_entry, bucket=None,
+                   workers=1, plan_file=None, incremental=False, executor=execute_move_plan):
+    """
+    Runs the organizer pipeline over a folder with the given stages.
+    mode names the configuration and keys the incremental scan cache.
+    With workers > 1 the moves run on a thread pool of that size.
+    A dry run can save its plan to plan_file for later execution.
+    incremental only considers directories that changed since the last incremental run.
+    Returns the MovePlan.
+    """
+    # Absolute, so the cached directory keys match however the folder was typed
+    folder = os.path.abspath(folder)
+    with profiler.phase("load_state"):
+        scan_state = load_scan_state(folder, mode) if incremental else None
+    plan = plan_moves(folder, conflict_resolution, classifier, bucket, scan_state)
+    if dry_run:
+        print_move_plan(plan)
+        if plan_file:
+            with profiler.phase("save_plan"):
+                plan.save(plan_file)
+    else:
+        with profiler.phase("execute"):
+            executor(plan, workers)
+        if incremental:
+            with profiler.phase("save_state"):
+                save_scan_state(folder, scan_state, mode)
+    return plan
+
+
+def organize_files_by_type(folder, dry_run, conflict_resolution, workers=1, plan_file=None, incremental=False):
+    """
+    Organizes files in a given folder into subfolders based on file types.
+    Each file processed updates the progress bar.
+    """
+    return organize_files(folder, dry_run, conflict_resolution, "type",
+                          workers=workers, plan_file=plan_file, incremental=incremental)
+
+
+def organize_files_by_type_and_date(folder, dry_run, conflict_resolution, workers=1, plan_file=None, incremental=False):
+    """
+    Organizes files in a given folder into subfolders based on file type and modification date.
+    Each file processed updates the progress bar.
+    """
+    return organize_files(folder, dry_run, conflict_resolution, "type_date", bucket=date_bucket,
+                          workers=workers, plan_file=plan_file, incremental=incremental)
+
+
+def organize_photos_videos_by_type_and_date(folder, dry_run, conflict_resolution,
+                                            manual_naming_photos=False, manual_naming_videos=False,
+                                            workers=1, plan_file=None, incremental=False, use_capture_date=True):
+    """
+    Organizes both photo and video files in a given folder into subfolders based on their file type
+    and capture date (modification date when use_capture_date is off or no metadata date exists).
+    A progress bar is updated for each file moved.
+    """
+    named_categories = set()
+    if manual_naming_photos:
+        named_categories.add("Image Files")
+    if manual_naming_videos:
+        named_categories.add("Video Files")
+    base_bucket = capture_date_bucket if use_capture_date else date_bucket
+    bucket = manual_date_bucket(named_categories, base_bucket) if named_categories else base_bucket
+    return organize_files(folder, dry_run, conflict_resolution, "photos_videos",
+                          classifier=category_classifier({"Image Files", "Video Files"}), bucket=bucket,
+                          workers=workers, plan_file=plan_file, incremental=incremental)
+
+
+def organize_photos_by_type_and_date(folder, dry_run, conflict_resolution, manual_naming_photos=False,
+                                     workers=1, plan_file=None, incremental=False, use_capture_date=True):
+    """
+    Organizes only photo files in a given folder into subfolders based on capture date
+    (modification date when use_capture_date is off or no metadata date exists).
+    A progress bar is updated for each file moved.
+    """
+    base_bucket = capture_date_bucket if use_capture_date else date_bucket
+    bucket = manual_date_bucket({"Image Files"}, base_bucket) if manual_naming_photos else base_bucket
+    return organize_files(folder, dry_run, conflict_resolution, "photos",
+                          classifier=category_classifier({"Image Files"}), bucket=bucket,
+                          workers=workers, plan_file=plan_file, incremental=incremental)
+
+
+def organize_videos_by_type_and_date(folder, dry_run, conflict_resolution, manual_naming_videos=False,
+                                     workers=1, plan_file=None, incremental=False, use_capture_date=True):
+    """
+    Organizes only video files in a given folder into subfolders based on capture date
+    (modification date when use_capture_date is off or no metadata date exists).
+    A progress bar is updated for each file moved.
+    """
+    base_bucket = capture_date_bucket if use_capture_date else date_bucket
+    bucket = manual_date_bucket({"Video Files"}, base_bucket) if manual_naming_videos else base_bucket
+    return organize_files(folder, dry_run, conflict_resolution, "videos",
+                          classifier=category_classifier({"Video Files"}), bucket=bucket,
+                          workers=workers, plan_file=plan_file, incremental=incremental)
+
+
+# inotify constants (see <sys/inotify.h>) used by watch mode
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+
+class InotifyWatcher:
+    """
+    Minimal ctypes wrapper around Linux inotify. Raises OSError where inotify is unavailable.
+    """
+
+    def __init__(self):
+        import ctypes.util
+        self._ctypes = ctypes
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or libc_name is None:
+            raise OSError("inotify is not available on this platform")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(self._ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {}  # Watch descriptor -> directory path
+
+    def add_watch(self, path):
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(self._ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.paths[wd] = path
+
+    def read_events(self):
+        """
+        Returns the pending events as (directory, name, mask) tuples.
+        """
+        events = []
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return events
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+            offset += 16
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+            elif mask & IN_Q_OVERFLOW or wd in self.paths:
+                events.append((self.paths.get(wd), name, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def organize_arrival(folder, source_path, conflict_resolution):
+    """
+    Moves one newly arrived file into its category folder (watch mode).
+    """
+    file = os.path.basename(source_path)
+    category = classify_file(file, source_path, lambda: os.stat(source_path))
+    if category == "Other Files" and settings["sniff_content"]:
+        try:
+            category = sniff_category(source_path, os.stat(source_path)) or category
+        except OSError:
+            pass
+    target_folder = os.path.join(folder, category)
+    try:
+        os.makedirs(target_folder, exist_ok=True)
+        if execute_move(source_path, os.path.join(target_folder, file), conflict_resolution):
+            print(f"Moved {file} -> {target_folder}")
+    except OSError as e:
+        print(f"Could not move {file}: {e}")
+
+
+def watch_folder(folder, conflict_resolution, settle_seconds=0.5, poll_interval=1.0):
+    """
+    Watches a folder and organizes each new file by type as soon as its writes settle,
+    until interrupted with Ctrl+C.
+    On Linux inotify close-write/moved-to events are used, so an idle watch costs no CPU;
+    elsewhere the folder is polled every poll_interval seconds, listing only changed directories.
+    A file is moved once it has been quiet for settle_seconds and its size is unchanged.
+    """
+    folder = os.path.abspath(folder)  # Journal and prune paths must not depend on the working directory
+    prune = organized_folders(folder)
+    exclude = compile_exclude_globs(settings["exclude_globs"])
+    pending = {}  # File path -> (deadline, size when last seen)
+
+    def schedule(path):
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            return
+        pending[path] = (time.monotonic() + settle_seconds, size)
+
+    def process_due():
+        now = time.monotonic()
+        for path, (deadline, size) in list(pending.items()):
+            if deadline > now:
+                continue
+            try:
+                current_size = os.stat(path).st_size
+            except OSError:
+                del pending[path]  # Renamed or deleted before it settled
+                continue
+            if current_size != size:
+                pending[path] = (now + settle_seconds, current_size)
+                continue
+            del pending[path]
+            organize_arrival(folder, path, conflict_resolution)
+        undo_journal.flush()
+
+    def watch_tree(watcher, path):
+        # Watch the directory first, then queue what is already inside so nothing slips through
+        try:
+            watcher.add_watch(path)
+        except OSError as e:
+            print(f"Cannot watch {path}: {e}")
+            return
+        pending_dirs = [path]
+        while pending_dirs:
+            current = pending_dirs.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.path not in prune and (exclude is None or not is_excluded(exclude, folder, entry.path)):
+                                try:
+                                    watcher.add_watch(entry.path)
+                                except OSError as e:
+                                    print(f"Cannot watch {entry.path}: {e}")
+                                    continue
+                                pending_dirs.append(entry.path)
+                        else:
+                            schedule(entry.path)
+            except OSError:
+                continue
+
+    try:
+        watcher = InotifyWatcher()
+    except (OSError, AttributeError):
+        watcher = None
+
+    print(f"Watching folder: {folder} (press Ctrl+C to stop)")
+    try:
+        if watcher is not None:
+            try:
+                watch_tree(watcher, folder)
+                while True:
+                    process_due()
+                    timeout = None
+                    if pending:
+                        timeout = max(0.0, min(deadline for deadline, _ in pending.values()) - time.monotonic())
+                    readable, _, _ = select.select([watcher.fd], [], [], timeout)
+                    if not readable:
+                        continue
+                    for directory, name, mask in watcher.read_events():
+                        if mask & IN_Q_OVERFLOW:
+                            # Events were dropped; fall back to a rescan of the tree
+                            for entry in scan_source_files(folder):
+                                schedule(entry.path)
+                            continue
+                        path = os.path.join(directory, name)
+                        if mask & IN_ISDIR:
+                            if path not in prune and (exclude is None or not is_excluded(exclude, folder, path)):
+                                watch_tree(watcher, path)
+                        elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                            schedule(path)
+            finally:
+                watcher.close()
+        else:
+            scan_state = {}
+            candidates = {}  # File path -> (size, mtime_ns, time first seen unchanged)
+            while True:
+                # Only directories whose mtime changed are listed again
+                for entry in scan_files(folder, prune=prune, state=scan_state, exclude=exclude):
+                    candidates.setdefault(entry.path, None)
+                now = time.monotonic()
+                for path, seen in list(candidates.items()):
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        del candidates[path]
+                        continue
+                    signature = (st.st_size, st.st_mtime_ns)
+                    if seen is None or seen[:2] != signature:
+                        candidates[path] = signature + (now,)
+                    elif now - seen[2] >= settle_seconds:
+                        del candidates[path]
+                        organize_arrival(folder, path, conflict_resolution)
+                undo_journal.flush()
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+def find_last_run():
+    """
+    Returns the ID of the newest run in the undo journal that has not been undone yet, or None.
+    """
+    undone_runs = set()
+    for _, record in undo_journal.iter_backwards():
+        if record["op"] == "undo_end":
+            undone_runs.add(record["run"])
+        elif record["op"] in ("move", "dedupe") and record["run"] not in undone_runs:
+            return record["run"]
+    return None
+
+
+def undo_last_operation(run_id=None, checkpoint_every=1000):
+    """
+    Reverses the file moves of one run recorded in the undo journal (the newest run by default).
+    The journal is streamed backwards, and progress is checkpointed in the journal,
+    so an undo that was interrupted resumes where it stopped.
+    """
+    undo_journal.end_run()
+    if run_id is None:
+        run_id = find_last_run()
+    if run_id is None:
+        print("No operations to undo.")
+        return
+    resume_offset = None
+    undone = 0
+    # Process in reverse order to undo moves correctly
+    for offset, record in undo_journal.iter_backwards():
+        if record.get("run") != run_id:
+            continue
+        op = record["op"]
+        if op == "undo_end":
+            print(f"Run {run_id} has already been undone.")
+            return
+        elif op == "undo_progress" and resume_offset is None:
+            resume_offset = record["offset"]
+            print(f"Resuming interrupted undo of run {run_id}.")
+        elif op in ("move", "dedupe"):
+            if resume_offset is not None and offset >= resume_offset:
+                continue  # Already undone before the interruption
+            source = record["source"]
+            target = record["target"]
+            if op == "dedupe" and os.path.exists(source):
+                pass  # Already restored
+            elif not os.path.exists(target):
+                if not os.path.exists(source):
+                    event_log.emit("undo_missing", source, target)
+                # Otherwise it was undone after the last checkpoint of an interrupted undo
+            elif op == "dedupe":
+                shutil.copy2(target, source)  # The removed duplicate had the same content
+                event_log.emit("undone", target, source, duplicate=True)
+            else:
+                move_file(target, source)
+                event_log.emit("undone", target, source)
+            undone += 1
+            if undone % checkpoint_every == 0:
+                undo_journal.write_marker({"op": "undo_progress", "run": run_id, "offset": offset})
+        elif op == "begin":
+            break
+    undo_journal.write_marker({"op": "undo_end", "run": run_id})
+    notify_user("operation_completed")
+
+
+def organize_roots_concurrently(folders, dry_run, conflict_resolution, per_device=1):
+    """
+    Organizes independent root folders by type at the same time.
+    At most per_device roots on the same device (st_dev) run at once, and nested roots never
+    run together. All roots share one aggregated progress bar whose total grows as each root
+    is planned. Returns a per-root result summary list.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    roots = []
+    for folder in folders:
+        if not os.path.isdir(folder):
+            print(f"Folder '{folder}' is invalid. Skipping.")
+            continue
+        folder = os.path.abspath(folder)  # As in organize_files, so journal paths are absolute
+        roots.append((folder, os.path.realpath(folder), os.stat(folder).st_dev))
+    device_limits = {device: threading.Semaphore(max(1, per_device)) for _, _, device in roots}
+    pbar_lock = threading.Lock()  # Roots grow the shared total from their own threads
+    # Roots inside another root share that root's lock so they are organized one after the other
+    family_locks = {}
+    for folder, real_path, _ in roots:
+        top = min((other for _, other, _ in roots
+                   if real_path == other or real_path.startswith(other.rstrip(os.sep) + os.sep)), key=len)
+        family_locks[folder] = family_locks.setdefault(top, threading.Lock())
+
+    def organize_root(folder, device, pbar):
+        result = {"folder": folder, "device": device, "planned": 0, "moved": 0, "seconds": 0.0, "error": None}
+        with device_limits[device], family_locks[folder]:
+            start = time.perf_counter()
+            try:
+                plan = plan_moves(folder, conflict_resolution)
+                result["planned"] = len(plan.moves)
+                if dry_run:
+                    print_move_plan(plan)
+                else:
+                    with pbar_lock:
+                        pbar.total += len(plan.moves)
+                        pbar.refresh()
+                    result["moved"] = execute_move_plan(plan, pbar=pbar)
+            except OSError as e:
+                result["error"] = str(e)
+            result["seconds"] = round(time.perf_counter() - start, 3)
+        return result
+
+    with progress_bar(0) as pbar, ThreadPoolExecutor(max_workers=max(1, len(roots))) as executor:
+        futures = [executor.submit(organize_root, folder, device, pbar) for folder, _, device in roots]
+        results = [future.result() for future in futures]
+
+    for result in results:
+        status = f"error: {result['error']}" if result["error"] else f"{result['moved']}/{result['planned']} moved"
+        print(f"{result['folder']}: {status} in {result['seconds']}s")
+    return results
+
+
+def hash_candidate(item):
+    """
+    Process pool worker for find_duplicate_files: hashes one (path, size, partial) item.
+    Returns None when the file can no longer be read.
+    """
+    path, size, partial = item
+    try:
+        return hash_file_contents(path, size, partial)
+    except OSError:
+        return None
+
+
+def group_by_digest(executor, candidates, partial):
+    """
+    Hashes (size, path) candidates on the process pool and returns the groups of two or more
+    paths that share a size and digest.
+    """
+    groups = {}
+    items = [(path, size, partial) for size, path in candidates]
+    for (size, path), digest in zip(candidates, executor.map(hash_candidate, items, chunksize=64)):
+        if digest is not None:
+            groups.setdefault((size, digest), []).append(path)
+    return [(size, paths) for (size, _), paths in groups.items() if len(paths) > 1]
+
+
+def find_duplicate_files(folders, report_path=None, workers=None, shard_size=100000, edge_bytes=1 << 12):
+    """
+    Finds files with identical content anywhere under the given folders and writes one JSON line
+    per duplicate group ({"size", "paths"}) to the report file.
+    Returns a summary with the number of groups, duplicate files and reclaimable bytes
+    (everything but one copy of each group).
+
+    Files are compared by size, then by a hash of their first and last few KB, then by a full hash;
+    hashing runs on a process pool. To keep memory bounded on very large trees, the first pass only
+    counts files per size, and the second streams the paths whose size is shared into temporary
+    shard files (roughly shard_size paths each, split by size) that are then processed one at a time.
+    Hard links to the same file are counted once, since removing them reclaims nothing.
+    """
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    report_path = report_path or settings["duplicates_report"]
+    exclude = compile_exclude_globs(settings["exclude_globs"])
+    roots = [os.path.abspath(folder) for folder in folders if os.path.isdir(folder)]
+    # Drop roots nested inside another root so no file is seen twice
+    roots = [root for root in roots
+             if not any(other != root and root.startswith(other.rstrip(os.sep) + os.sep) for other in roots)]
+    roots = list(dict.fromkeys(roots))
+
+    def walk():
+        for root in roots:
+            for entry in iter_files(root, exclude=exclude):
+                try:
+                    if entry.is_symlink():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                if st.st_size > 0:
+                    yield entry.path, st
+
+    print("Counting file sizes...")
+    size_counts = {}
+    for _, st in walk():
+        size_counts[st.st_size] = size_counts.get(st.st_size, 0) + 1
+    candidates = sum(count for count in size_counts.values() if count > 1)
+    shard_count = max(1, -(-candidates // shard_size))
+    summary = {"groups": 0, "files": 0, "reclaimable_bytes": 0, "report": report_path}
+
+    with tempfile.TemporaryDirectory(prefix="fileorg_dupes_") as shard_dir, \
+            open(report_path, "w", encoding="utf-8") as report:
+        shard_paths = [os.path.join(shard_dir, f"{i}.jsonl") for i in range(shard_count)]
+        shards = [open(path, "w", encoding="utf-8") for path in shard_paths]
+        try:
+            for path, st in walk():
+                if size_counts.get(st.st_size, 0) > 1:
+                    shard = shards[st.st_size % shard_count]
+                    shard.write(json.dumps([st.st_size, st.st_dev, st.st_ino, path]) + "\n")
+        finally:
+            for shard in shards:
+                shard.close()
+        size_counts = None
+
+        with ProcessPoolExecutor(max_workers=workers) as executor, progress_bar(candidates, "Finding duplicates") as pbar:
+            for shard_path in shard_paths:
+                by_size = {}
+                seen_inodes = set()
+                with open(shard_path, encoding="utf-8") as shard:
+                    for line in shard:
+                        size, dev, ino, path = json.loads(line)
+                        pbar.update(1)
+                        if (dev, ino) in seen_inodes:
+                            continue  # Another hard link to a file already listed
+                        seen_inodes.add((dev, ino))
+                        by_size.setdefault(size, []).append(path)
+                os.remove(shard_path)
+                pending = [(size, path) for size, paths in by_size.items() if len(paths) > 1 for path in paths]
+                by_size = seen_inodes = None
+
+                groups = []
+                for size, paths in group_by_digest(executor, pending, True):
+                    if size <= 2 * edge_bytes:
+                        groups.append((size, paths))  # The partial hash already covered every byte
+                    else:
+                        groups.extend(group_by_digest(executor, [(size, path) for path in paths], False))
+                for size, paths in groups:
+                    report.write(json.dumps({"size": size, "paths": sorted(paths)}, ensure_ascii=False) + "\n")
+                    summary["groups"] += 1
+                    summary["files"] += len(paths)
+                    summary["reclaimable_bytes"] += size * (len(paths) - 1)
+
+    print(f"Found {summary['groups']} groups of duplicates ({summary['files']} files); "
+          f"{summary['reclaimable_bytes'] / (1 << 20):.1f} MB reclaimable. Report saved to '{report_path}'.")
+    return summary
+
+
+def multi_folder_support(dry_run, conflict_resolution, folders=None, concurrent=False, per_device=1,
+                         find_duplicates=False):
+    """
+    Organizes files in multiple folders.
+    Prompts the user to enter comma-separated folder paths (unless folders is given) and processes each folder.
+    With concurrent=True independent roots are organized at the same time (see organize_roots_concurrently)
+    and the per-root results are returned.
+    With find_duplicates=True a duplicate report across all the folders (see find_duplicate_files)
+    is written first.
+    """
+    if folders is None:
+        folders_input = input("Enter the folder paths to organize (separated by commas): ").strip()
+        folders = [folder.strip() for folder in folders_input.split(",") if folder.strip()]
+    if find_duplicates:
+        find_duplicate_files(folders)
+    if concurrent:
+        return organize_roots_concurrently(folders, dry_run, conflict_resolution, per_device)
+    for folder in folders:
+        if not os.path.isdir(folder):
+            print(f"Folder '{folder}' is invalid. Skipping.")
+            continue
+        if dry_run:
+            print(f"[DRY RUN] Preview organization for folder: {folder}")
+        else:
+            print(f"Organizing folder: {folder}")
+        organize_files_by_type(folder, dry_run, conflict_resolution)
+
+
+def create_restore_point(folder, path=None):
+    """
+    Records every file under the folder into a restore point file.
+    Restore points are gzip-compressed JSON lines: a header, then one
+    [relative path, size, mtime_ns, inode] record per file, written while the tree is walked,
+    so memory use does not grow with the number of files.
+    Returns the number of files recorded.
+    """
+    path = path or settings["restore_point"]
+    folder = os.path.abspath(folder)
+    count = 0
+    temp_path = path + ".tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        f.write(json.dumps({"folder": folder, "timestamp": time.ctime(), "format": 2}) + "\n")
+        for entry in iter_files(folder):
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue  # Removed while walking
+            record = [os.path.relpath(entry.path, folder), st.st_size, st.st_mtime_ns, st.st_ino]
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            count += 1
+    os.replace(temp_path, path)  # An interrupted run leaves the previous restore point intact
+    print(f"Restore point with {count} files created and saved to '{path}'.")
+    return count
+
+
+def iter_restore_point(path):
+    """
+    Streams a restore point: returns the header dict and a generator of
+    (absolute path, size, mtime_ns, inode) tuples.
+    Old restore_point.json files (a plain list of paths) are still read; their
+    size, mtime_ns and inode are None.
+    """
+    with open(path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    if not compressed:
+        with open(path, encoding="utf-8") as f:
+            restore_point = json.load(f)
+        header = {"folder": restore_point["folder"], "timestamp": restore_point.get("timestamp"), "format": 1}
+        return header, ((file_path, None, None, None) for file_path in restore_point["files"])
+
+    f = gzip.open(path, "rt", encoding="utf-8")
+    header = json.loads(f.readline())
+
+    def records():
+        with f:
+            for line in f:
+                rel_path, size, mtime_ns, inode = json.loads(line)
+                yield os.path.join(header["folder"], rel_path), size, mtime_ns, inode
+
+    return header, records()
+
+
+def restore_from_restore_point(path=None, dry_run=False):
+    """
+    Moves files back to where a restore point recorded them, touching only files that moved.
+
+    The diff takes two linear passes. First the restore point is streamed and each recorded path
+    is checked with one lstat: files still in place (same inode, size and mtime) are forgotten
+    straight away, so only the files that changed location are held in memory, keyed by inode and,
+    for files that were copied to another filesystem, by (size, mtime, name) when that is unambiguous. Then the current tree
+    is walked once and every file is looked up in those tables by its inode (free from scandir)
+    and its stat result, and moved back if it matches. Files whose original location is taken are skipped.
+    Returns the number of files moved back (or that would be, in a dry run).
+    """
+    path = path or settings["restore_point"]
+    header, records = iter_restore_point(path)
+    if header["format"] < 2:
+        print("This restore point only lists file paths. Create a new restore point to be able to restore from it.")
+        return 0
+    folder = header["folder"]
+    by_inode = {}  # inode -> (original path, size, mtime_ns)
+    by_stat = {}  # (size, mtime_ns, file name without "_N") -> original path, or None when ambiguous
+    unchanged = 0
+    for original, size, mtime_ns, inode in records:
+        try:
+            st = os.lstat(original)
+            if (st.st_ino, st.st_size, st.st_mtime_ns) == (inode, size, mtime_ns):
+                unchanged += 1
+                continue
+        except OSError:
+            pass
+        by_inode[inode] = (original, size, mtime_ns)
+        key = (size, mtime_ns, collision_key(original)[1])
+        by_stat[key] = None if key in by_stat else original
+
+    moves = []
+    if by_inode:
+        # Category folders may be symlinks onto another volume (see move_file); walk those too
+        roots = [folder] + sorted(path for path in organized_folders(folder) if os.path.islink(path))
+        entries = (entry for root in roots for entry in iter_files(root))
+        for entry in entries:
+            candidate = by_inode.get(entry.inode())
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if candidate is not None and (st.st_size, st.st_mtime_ns) == candidate[1:]:
+                original = candidate[0]
+            else:
+                original = by_stat.get((st.st_size, st.st_mtime_ns, collision_key(entry.path)[1]))
+            if original is not None and original != entry.path:
+                moves.append((entry.path, original))
+    missing = len(by_inode) - len(moves)
+    by_inode = by_stat = None
+
+    print(f"{unchanged} files are where the restore point left them; {len(moves)} moved since.")
+    if missing:
+        print(f"{missing} recorded files were changed, deleted or could not be matched and stay as they are.")
+    if dry_run:
+        for current, original in moves:
+            event_log.emit("restore_planned", current, original)
+        return len(moves)
+    restored = 0
+    index = TargetIndex()
+    with progress_bar(len(moves), "Restoring files") as pbar:
+        for current, original in moves:
+            if execute_move(current, original, "skip", index):
+                restored += 1
+            pbar.update(1)
+    print(f"Restored {restored} files from '{path}'.")
+    return restored
+
+
+def restore_point_update_file_types():
+    """
+    Presents a submenu for creating a restore point, updating file type categories
+    or restoring from a restore point.
+    """
+    print("1. Create Restore Point")
+    print("2. Update File Types")
+    print("3. Restore From Restore Point")
+    sub_choice = input("Enter your choice: ").strip()
+    if sub_choice == "1":
+        folder = input("Enter the folder path to create a restore point: ").strip()
+        if not os.path.isdir(folder):
+            notify_user("invalid_input")
+            return
+        create_restore_point(folder)
+    elif sub_choice == "3":
+        path = input(f"Enter the restore point file (press Enter for {settings['restore_point']}): ").strip()
+        path = path or settings["restore_point"]
+        if not os.path.isfile(path):
+            notify_user("invalid_input")
+            return
+        dry_run = input("Perform a dry run? (y/n): ").strip().lower() == "y"
+        restore_from_restore_point(path, dry_run)
+    elif sub_choice == "2":
+        print("Current categories and their extensions:")
+        for cat, exts in categories.items():
+            print(f"{cat}: {', '.join(exts)}")
+        print("1. Add Category")
         print("2. Remove Category")
         print("3. Update Category (Add/Remove Extensions)")
         update_choice = input("Enter your choice: ").strip()
@@ -656,12 +2977,12 @@ def restore_point_update_file_types():
             if new_cat in categories:
                 print("Category already exists.")
             else:
-                categories[new_cat] = new_exts
+                set_category(new_cat, new_exts)
                 print(f"Category '{new_cat}' added.")
         elif update_choice == "2":
             del_cat = input("Enter the category name to remove: ").strip()
             if del_cat in categories:
-                del categories[del_cat]
+                remove_category(del_cat)
                 print(f"Category '{del_cat}' removed.")
             else:
                 print("Category not found.")
@@ -674,12 +2995,12 @@ def restore_point_update_file_types():
                 if action == "add":
                     new_ext = input("Enter new extensions to add (comma-separated): ").split(',')
                     new_ext = {ext.strip() for ext in new_ext if ext.strip()}
-                    categories[upd_cat].update(new_ext)
+                    add_category_extensions(upd_cat, new_ext)
                     print("Extensions added.")
                 elif action == "remove":
                     rem_ext = input("Enter extensions to remove (comma-separated): ").split(',')
                     rem_ext = {ext.strip() for ext in rem_ext if ext.strip()}
-                    categories[upd_cat] = {ext for ext in categories[upd_cat] if ext not in rem_ext}
+                    remove_category_extensions(upd_cat, rem_ext)
                     print("Extensions removed.")
                 else:
                     print("Invalid action.")
@@ -691,6 +3012,169 @@ def restore_point_update_file_types():
         notify_user("invalid_input")
 
 
+# Benchmark extension mix: extension -> relative weight (one per category plus unknown files)
+benchmark_extensions = {".jpg": 4, ".png": 1, ".mp4": 1, ".txt": 2, ".pdf": 1, ".mp3": 1, ".zip": 1, ".xyz": 1}
+
+# Benchmark mode -> organizer call (folder, workers); conflicts use rename so collisions exercise the allocator
+benchmark_modes = {
+    "type": lambda folder, workers: organize_files_by_type(folder, False, "rename", workers),
+    "type-date": lambda folder, workers: organize_files_by_type_and_date(folder, False, "rename", workers),
+    "photos-videos": lambda folder, workers: organize_photos_videos_by_type_and_date(folder, False, "rename",
+                                                                                     workers=workers),
+    "photos": lambda folder, workers: organize_photos_by_type_and_date(folder, False, "rename", workers=workers),
+    "videos": lambda folder, workers: organize_videos_by_type_and_date(folder, False, "rename", workers=workers)
+}
+
+# os functions counted as syscalls during a benchmark run (os.makedirs and os.path.exists go through these)
+benchmark_counted_calls = ["scandir", "listdir", "stat", "lstat", "mkdir", "rename", "replace", "remove", "open"]
+
+
+def generate_synthetic_tree(root, files=10000, depth=3, extensions=None, collision_rate=0.1,
+                            date_spread_days=365, file_size=1024, seed=0):
+    """
+    Fills root with a reproducible synthetic tree for benchmarks: files spread over nested
+    directories up to depth levels deep, extensions drawn from the weighted extensions mix,
+    a collision_rate fraction of files reusing a name from another directory (so they collide
+    in the target folders), and modification times spread over the last date_spread_days days.
+    collision_rate must be at least 0 and below 1.
+    """
+    if not 0 <= collision_rate < 1:
+        raise ValueError(f"collision_rate must be at least 0 and below 1, got {collision_rate}")
+    rng = random.Random(seed)
+    extensions = extensions or benchmark_extensions
+    ext_choices, ext_weights = list(extensions), list(extensions.values())
+    folders = [root] + [os.path.join(root, *[f"dir{rng.randrange(8)}" for _ in range(rng.randint(1, depth))])
+                        for _ in range(max(1, files // 200))] if depth > 0 else [root]
+    payload = os.urandom(file_size)
+    now = time.time()
+    names = []
+    taken = set()
+    while len(taken) < files:
+        folder = rng.choice(folders)
+        name = rng.choice(names) if names and rng.random() < collision_rate else None
+        if name is None or (folder, name) in taken:
+            # A new name is always free, so every iteration adds a file
+            name = f"file{len(names)}{rng.choices(ext_choices, ext_weights)[0]}"
+            names.append(name)
+        taken.add((folder, name))
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, name)
+        with open(path, "wb") as f:
+            f.write(payload)
+        mtime = now - rng.uniform(0, date_spread_days) * 86400
+        os.utime(path, (mtime, mtime))
+    return len(taken)
+
+
+def run_benchmark_mode(mode, folder, workers, scratch):
+    """
+    Runs one organizer mode over folder and returns its measurements. Meant to run in a fresh
+    process (see run_benchmark), so peak RSS and the syscall counters belong to this run only;
+    the undo journal and metadata cache are pointed at the scratch directory.
+    """
+    settings["progress"] = False
+    undo_journal.path = os.path.join(scratch, "undo_journal.jsonl")
+    metadata_cache.path = os.path.join(scratch, "metadata_cache.sqlite3")
+    content_type_cache.path = metadata_cache.path
+    counts = dict.fromkeys(benchmark_counted_calls, 0)
+
+    def counted(name, function):
+        def wrapper(*args, **kwargs):
+            counts[name] += 1
+            return function(*args, **kwargs)
+        return wrapper
+
+    for name in benchmark_counted_calls:
+        setattr(os, name, counted(name, getattr(os, name)))
+    io_before = read_proc_io()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        start = time.perf_counter()
+        plan = benchmark_modes[mode](folder, workers)
+        undo_journal.end_run()
+        seconds = time.perf_counter() - start
+    io_after = read_proc_io()
+    if io_before and io_after:
+        counts["read"] = io_after["syscr"] - io_before["syscr"]
+        counts["write"] = io_after["syscw"] - io_before["syscw"]
+    try:
+        import resource
+        peak_rss_mb = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # KB on Linux
+    except ImportError:
+        peak_rss_mb = None  # Not available on Windows
+    files = len(plan.moves)
+    return {"files": files, "seconds": round(seconds, 4),
+            "files_per_sec": round(files / seconds, 1) if seconds else None,
+            "syscalls": counts, "syscalls_per_file": round(sum(counts.values()) / files, 2) if files else None,
+            "peak_rss_mb": peak_rss_mb}
+
+
+def read_proc_io():
+    """
+    Returns this process's I/O counters from /proc/self/io (Linux), or None.
+    """
+    try:
+        with open("/proc/self/io") as f:
+            return {key: int(value) for key, value in (line.split(":") for line in f)}
+    except OSError:
+        return None
+
+
+def run_benchmark(modes=None, files=10000, depth=3, extensions=None, collision_rate=0.1, date_spread_days=365,
+                  file_size=1024, workers=1, repeat=1, base_dir=None, output=None, baseline=None, seed=0):
+    """
+    Benchmarks the organizer modes on freshly generated synthetic trees (see generate_synthetic_tree)
+    and prints files/sec, syscalls per file and peak RSS for each. Each run happens in its own process
+    on its own tree; with repeat > 1 the fastest run is kept. Trees are built in base_dir, by default
+    /dev/shm (tmpfs) when available so disk speed does not dominate.
+    Results are saved to output as JSON and, when a baseline results file is given, compared against it.
+    Returns the results.
+    """
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    modes = modes or list(benchmark_modes)
+    if base_dir is None and os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        base_dir = "/dev/shm"
+    config = {"files": files, "depth": depth, "extensions": extensions or benchmark_extensions,
+              "collision_rate": collision_rate, "date_spread_days": date_spread_days, "file_size": file_size,
+              "workers": workers, "repeat": repeat, "seed": seed}
+    results = {"config": config, "python": sys.version.split()[0], "platform": sys.platform,
+               "timestamp": time.ctime(), "modes": {}}
+    for mode in modes:
+        best = None
+        for _ in range(max(1, repeat)):
+            scratch = tempfile.mkdtemp(prefix="fileorg_bench_", dir=base_dir)
+            try:
+                folder = os.path.join(scratch, "tree")
+                generate_synthetic_tree(folder, files, depth, extensions, collision_rate, date_spread_days,
+                                        file_size, seed)
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    result = executor.submit(run_benchmark_mode, mode, folder, workers, scratch).result()
+            finally:
+                shutil.rmtree(scratch, ignore_errors=True)
+            if best is None or result["seconds"] < best["seconds"]:
+                best = result
+        results["modes"][mode] = best
+        print(f"{mode:>14}: {best['files']} files in {best['seconds']:.3f}s = {best['files_per_sec']} files/s, "
+              f"{best['syscalls_per_file']} syscalls/file, peak RSS {best['peak_rss_mb']} MB")
+
+    if baseline:
+        with open(baseline, encoding="utf-8") as f:
+            baseline_modes = json.load(f)["modes"]
+        for mode, result in results["modes"].items():
+            base = baseline_modes.get(mode)
+            if not base or not base.get("files_per_sec") or not result["files_per_sec"]:
+                continue
+            change = (result["files_per_sec"] / base["files_per_sec"] - 1) * 100
+            flag = "  <-- slower" if change < -10 else ""
+            print(f"{mode:>14}: {change:+.1f}% files/s vs baseline ({base['files_per_sec']} files/s){flag}")
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"Benchmark results saved to '{output}'.")
+    return results
+
+
 def main():
     """
     Main function for FileOrg.
@@ -705,7 +3189,9 @@ def main():
       8. Restore Point / Update File Types
       9. Change Language
       10. Manage File Categories
-      11. Exit
+      11. Chat-like Support (Help)
+      12. Execute a Saved Move Plan
+      13. Exit
     """
     while True:
         choice = user_menu()  # Show the menu and get the user choice
@@ -715,7 +3201,7 @@ def main():
             chat_support_interface()
 
             choice = user_menu()  # Show the menu and get the user choice
-        if choice == 11:  # Exit
+        if choice == 13:  # Exit
             notify_user("exiting")
             break
         elif choice == 9:  # Change Language
@@ -734,24 +3220,41 @@ def main():
                 new_cat = input("Enter new category name: ").strip()
                 new_exts = input("Enter file extensions (comma-separated): ").split(',')
                 new_exts = {ext.strip() for ext in new_exts if ext.strip()}
-                categories[new_cat] = new_exts
+                set_category(new_cat, new_exts)
                 print(f"Category '{new_cat}' added.")
             elif sub_choice == "3":
                 del_cat = input("Enter category name to remove: ").strip()
                 if del_cat in categories:
-                    del categories[del_cat]
+                    remove_category(del_cat)
                     print(f"Category '{del_cat}' removed.")
                 else:
                     print("Category not found.")
             else:
                 notify_user("invalid_input")
         elif choice == 6:  # Undo Last Operation
-            undo_last_operation()
+            run_id = input("Enter the run ID to undo (press Enter for the last operation): ").strip() or None
+            undo_last_operation(run_id)
         elif choice == 7:  # Multi-Folder Support
             dry_run_input = input("Perform a dry run? (y/n): ").strip().lower()
             dry_run = (dry_run_input == "y")
-            conflict_resolution = input("Choose conflict resolution (skip, rename, overwrite): ").strip().lower()
-            multi_folder_support(dry_run, conflict_resolution)
+            conflict_resolution = input("Choose conflict resolution (skip, rename, overwrite, dedupe): ").strip().lower()
+            concurrent_input = input("Organize the folders concurrently? (y/n): ").strip().lower()
+            concurrent = (concurrent_input == "y")
+            per_device = 1
+            if concurrent:
+                per_device_input = input("Folders to run at once per disk (press Enter for 1): ").strip()
+                per_device = int(per_device_input) if per_device_input.isdigit() and int(per_device_input) > 0 else 1
+            find_duplicates_input = input("Report duplicate files across the folders first? (y/n): ").strip().lower()
+            multi_folder_support(dry_run, conflict_resolution, concurrent=concurrent, per_device=per_device,
+                                 find_duplicates=(find_duplicates_input == "y"))
+        elif choice == 12:  # Execute a Saved Move Plan
+            plan_file = input("Enter the path of the saved move plan: ").strip()
+            if not os.path.isfile(plan_file):
+                notify_user("invalid_input")
+                continue
+            plan = MovePlan.load(plan_file)
+            print(f"Executing {len(plan.moves)} planned moves for folder: {plan.folder}")
+            execute_move_plan(plan)
         elif choice == 8:  # Restore Point / Update File Types
             restore_point_update_file_types()
         elif choice == 1:  # Sort Files by Type
@@ -759,33 +3262,53 @@ def main():
             if not os.path.isdir(folder):
                 notify_user("invalid_input")
                 continue
-            conflict_resolution = input("Choose conflict resolution (skip, rename, overwrite): ").strip().lower()
+            conflict_resolution = input("Choose conflict resolution (skip, rename, overwrite, dedupe): ").strip().lower()
             dry_run_input = input("Perform a dry run? (y/n): ").strip().lower()
             dry_run = (dry_run_input == "y")
+            workers, plan_file = 1, None
+            if dry_run:
+                plan_file = input("Save the move plan to a file? (enter a path or press Enter to skip): ").strip() or None
+            else:
+                workers_input = input("Number of parallel move workers (press Enter for 1): ").strip()
+                workers = int(workers_input) if workers_input.isdigit() and int(workers_input) > 0 else 1
+            incremental_input = input("Only look at folders changed since the last incremental run? (y/n): ").strip().lower()
+            incremental = (incremental_input == "y")
             if dry_run:
                 print(f"[DRY RUN] Preview organization for folder: {folder}")
             else:
                 print(f"Organizing folder: {folder}")
-            organize_files_by_type(folder, dry_run, conflict_resolution)
+            organize_files_by_type(folder, dry_run, conflict_resolution, workers, plan_file, incremental)
+            if not dry_run:
+                watch_input = input("Keep watching the folder and organize new files as they arrive? (y/n): ").strip().lower()
+                if watch_input == "y":
+                    watch_folder(folder, conflict_resolution)
         elif choice == 2:  # Sort Files by Type and by Date
             folder = input("Enter the folder path to organize: ").strip()
             if not os.path.isdir(folder):
                 notify_user("invalid_input")
                 continue
-            conflict_resolution = input("Choose conflict resolution (skip, rename, overwrite): ").strip().lower()
+            conflict_resolution = input("Choose conflict resolution (skip, rename, overwrite, dedupe): ").strip().lower()
             dry_run_input = input("Perform a dry run? (y/n): ").strip().lower()
             dry_run = (dry_run_input == "y")
+            workers, plan_file = 1, None
+            if dry_run:
+                plan_file = input("Save the move plan to a file? (enter a path or press Enter to skip): ").strip() or None
+            else:
+                workers_input = input("Number of parallel move workers (press Enter for 1): ").strip()
+                workers = int(workers_input) if workers_input.isdigit() and int(workers_input) > 0 else 1
+            incremental_input = input("Only look at folders changed since the last incremental run? (y/n): ").strip().lower()
+            incremental = (incremental_input == "y")
             if dry_run:
                 print(f"[DRY RUN] Preview organization for folder: {folder}")
             else:
                 print(f"Organizing folder: {folder}")
-            organize_files_by_type_and_date(folder, dry_run, conflict_resolution)
+            organize_files_by_type_and_date(folder, dry_run, conflict_resolution, workers, plan_file, incremental)
         elif choice == 3:  # Sort Photos and Videos by Type and by Date (combined)
             folder = input("Enter the folder path to organize (Photos and Videos only): ").strip()
             if not os.path.isdir(folder):
                 notify_user("invalid_input")
                 continue
-            conflict_resolution = input("Choose conflict resolution (skip, rename, overwrite): ").strip().lower()
+            conflict_resolution = input("Choose conflict resolution (skip, rename, overwrite, dedupe): ").strip().lower()
             dry_run_input = input("Perform a dry run? (y/n): ").strip().lower()
             dry_run = (dry_run_input == "y")
             manual_photos_input = input("Manually name each date folder for photos? (y/n): ").strip().lower()
@@ -803,7 +3326,7 @@ def main():
             if not os.path.isdir(folder):
                 notify_user("invalid_input")
                 continue
-            conflict_resolution = input("Choose conflict resolution (skip, rename, overwrite): ").strip().lower()
+            conflict_resolution = input("Choose conflict resolution (skip, rename, overwrite, dedupe): ").strip().lower()
             dry_run_input = input("Perform a dry run? (y/n): ").strip().lower()
             dry_run = (dry_run_input == "y")
             manual_photos_input = input("Manually name each date folder for photos? (y/n): ").strip().lower()
@@ -818,7 +3341,7 @@ def main():
             if not os.path.isdir(folder):
                 notify_user("invalid_input")
                 continue
-            conflict_resolution = input("Choose conflict resolution (skip, rename, overwrite): ").strip().lower()
+            conflict_resolution = input("Choose conflict resolution (skip, rename, overwrite, dedupe): ").strip().lower()
             dry_run_input = input("Perform a dry run? (y/n): ").strip().lower()
             dry_run = (dry_run_input == "y")
             manual_videos_input = input("Manually name each date folder for videos? (y/n): ").strip().lower()
@@ -829,9 +3352,259 @@ def main():
                 print(f"Organizing folder: {folder}")
             organize_videos_by_type_and_date(folder, dry_run, conflict_resolution, manual_naming_videos)
 
+        event_log.report()
+        report_cross_device_moves()
+        run_id = undo_journal.end_run()
+        if run_id is not None:
+            print(f"Undo run ID: {run_id}")
         notify_user("operation_completed")
         pause_and_clear()  # Wait for user input and then clear the screen
 
 
+def positive_int(value):
+    """
+    argparse type for options that must be at least 1.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def fraction_below_one(value):
+    """
+    argparse type for fractions that must be at least 0 and below 1.
+    """
+    number = float(value)
+    if not 0 <= number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 0 and below 1, got {value}")
+    return number
+
+
+def build_arg_parser():
+    """
+    Builds the argparse parser for the non-interactive command line.
+    """
+    parser = argparse.ArgumentParser(
+        prog="FileORG2.0.py",
+        description="Organize files into category (and date) subfolders. Run without arguments for the interactive menu.")
+    parser.add_argument("--json", action="store_true",
+                        help="print a single JSON summary on stdout (other output goes to stderr)")
+    parser.add_argument("--no-progress", action="store_true", help="disable progress bars")
+    parser.add_argument("--config", metavar="FILE",
+                        help=f"category configuration file (default: {settings['category_config']})")
+    parser.add_argument("--sniff", action="store_true",
+                        help="classify files with unknown or missing extensions by their content")
+    parser.add_argument("--log", metavar="FILE", help="append every per-file event to FILE as JSON lines")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="time phases and file system operations and save a JSON summary to FILE")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="also save a Chrome trace (chrome://tracing, Perfetto) of the run to FILE")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_organize_options(sub):
+        sub.add_argument("--dry-run", action="store_true", help="preview without moving files")
+        sub.add_argument("--conflict", choices=list(conflict_resolvers), default="skip",
+                         help="what to do when the target file already exists (default: skip)")
+        sub.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                         help="directory name/path glob to skip (repeatable)")
+        sub.add_argument("--verify", action="store_true",
+                         help="hash files copied to another filesystem before deleting the originals")
+
+    for name, help_text in [("type", "sort files by type"), ("type-date", "sort files by type and by date"),
+                            ("photos-videos", "sort photos and videos by type and by date"),
+                            ("photos", "sort photos by type and by date"),
+                            ("videos", "sort videos by type and by date")]:
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("folder")
+        add_organize_options(sub)
+        sub.add_argument("--workers", type=positive_int, default=1, help="parallel move workers (default: 1)")
+        sub.add_argument("--plan-file", help="with --dry-run, save the move plan to this file")
+        sub.add_argument("--incremental", action="store_true",
+                         help="only look at folders changed since the last incremental run")
+        if name in ("photos-videos", "photos", "videos"):
+            sub.add_argument("--use-mtime", action="store_true",
+                             help="bucket by modification date instead of the capture date in the file's metadata")
+
+    sub = subparsers.add_parser("multi", help="sort several folders by type")
+    sub.add_argument("folders", nargs="+")
+    add_organize_options(sub)
+    sub.add_argument("--concurrent", action="store_true", help="organize independent folders at the same time")
+    sub.add_argument("--per-device", type=positive_int, default=1,
+                     help="with --concurrent, folders on the same disk to run at once (default: 1)")
+    sub.add_argument("--find-duplicates", action="store_true",
+                     help="write a report of duplicate files across the folders before organizing")
+
+    sub = subparsers.add_parser("duplicates", help="report duplicate files across folders without organizing")
+    sub.add_argument("folders", nargs="+")
+    sub.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                     help="directory name/path glob to skip (repeatable)")
+    sub.add_argument("--report", default=settings["duplicates_report"],
+                     help=f"JSON-lines report file (default: {settings['duplicates_report']})")
+    sub.add_argument("--workers", type=positive_int, help="hashing processes (default: one per CPU)")
+
+    sub = subparsers.add_parser("apply", help="execute a saved move plan")
+    sub.add_argument("plan_file")
+    sub.add_argument("--workers", type=positive_int, default=1, help="parallel move workers (default: 1)")
+    sub.add_argument("--verify", action="store_true",
+                     help="hash files copied to another filesystem before deleting the originals")
+
+    sub = subparsers.add_parser("watch", help="organize new files by type as they arrive")
+    sub.add_argument("folder")
+    add_organize_options(sub)
+    sub.add_argument("--settle", type=float, default=0.5, help="seconds a file must be quiet before it moves")
+
+    sub = subparsers.add_parser("undo", help="undo the last run (or a given run)")
+    sub.add_argument("--run-id", help="run ID to undo (default: the last run)")
+
+    sub = subparsers.add_parser("restore-point", help="create a restore point for a folder")
+    sub.add_argument("folder")
+    sub.add_argument("--output", default=settings["restore_point"], help="restore point file")
+
+    sub = subparsers.add_parser("benchmark", help="time the organizers on generated synthetic trees")
+    sub.add_argument("--modes", default=",".join(benchmark_modes),
+                     help=f"comma-separated organizer modes (default: {','.join(benchmark_modes)})")
+    sub.add_argument("--files", type=positive_int, default=10000, help="files per tree (default: 10000)")
+    sub.add_argument("--depth", type=int, default=3, help="maximum directory depth (default: 3)")
+    sub.add_argument("--extensions", help="extension mix as ext:weight pairs, e.g. .jpg:3,.txt:1")
+    sub.add_argument("--collision-rate", type=fraction_below_one, default=0.1,
+                     help="fraction of files reusing another file's name (default: 0.1)")
+    sub.add_argument("--date-spread", type=float, default=365, help="days modification times spread over")
+    sub.add_argument("--file-size", type=int, default=1024, help="bytes per file (default: 1024)")
+    sub.add_argument("--workers", type=positive_int, default=1, help="parallel move workers (default: 1)")
+    sub.add_argument("--repeat", type=positive_int, default=1, help="runs per mode; the fastest is kept")
+    sub.add_argument("--seed", type=int, default=0, help="random seed for the generated trees")
+    sub.add_argument("--dir", help="where to build the trees (default: /dev/shm if available, else the temp dir)")
+    sub.add_argument("--output", default="benchmark_results.json", help="results file")
+    sub.add_argument("--baseline", help="earlier results file to compare against")
+
+    sub = subparsers.add_parser("restore", help="move files back to where a restore point recorded them")
+    sub.add_argument("restore_point", nargs="?", default=settings["restore_point"])
+    sub.add_argument("--dry-run", action="store_true", help="list the files that would move back")
+    return parser
+
+
+def cli(argv):
+    """
+    Non-interactive entry point: runs one command from the argument list and returns an exit code.
+    No prompts, animations or screen clearing, so it can be driven from cron or scripts.
+    """
+    args = build_arg_parser().parse_args(argv)
+    settings["progress"] = not args.no_progress
+    event_log.path = args.log
+    if args.config:
+        settings["category_config"] = args.config
+        load_category_config()
+    if args.sniff:
+        settings["sniff_content"] = True
+    if args.profile or args.trace:
+        profiler.enable(trace_limit=1000000 if args.trace else 0)
+    if getattr(args, "exclude", None):
+        settings["exclude_globs"] = settings["exclude_globs"] + args.exclude
+    if getattr(args, "verify", False):
+        settings["verify_copies"] = True
+    folders = args.folders if args.command in ("multi", "duplicates") else [getattr(args, "folder", None)]
+    for folder in folders:
+        if folder is not None and not os.path.isdir(folder):
+            print(f"Folder '{folder}' is invalid.", file=sys.stderr)
+            return 2
+    if args.command == "apply" and not os.path.isfile(args.plan_file):
+        print(f"Plan file '{args.plan_file}' not found.", file=sys.stderr)
+        return 2
+    if args.command == "restore" and not os.path.isfile(args.restore_point):
+        print(f"Restore point '{args.restore_point}' not found.", file=sys.stderr)
+        return 2
+
+    summary = {"command": args.command}
+    start = time.perf_counter()
+    # In JSON mode all human-readable output goes to stderr, leaving stdout for the summary
+    output = contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext()
+    with output:
+        result = None
+        if args.command == "type":
+            result = organize_files_by_type(args.folder, args.dry_run, args.conflict, args.workers,
+                                            args.plan_file, args.incremental)
+        elif args.command == "type-date":
+            result = organize_files_by_type_and_date(args.folder, args.dry_run, args.conflict, args.workers,
+                                                     args.plan_file, args.incremental)
+        elif args.command == "photos-videos":
+            result = organize_photos_videos_by_type_and_date(args.folder, args.dry_run, args.conflict,
+                                                             workers=args.workers, plan_file=args.plan_file,
+                                                             incremental=args.incremental, use_capture_date=not args.use_mtime)
+        elif args.command == "photos":
+            result = organize_photos_by_type_and_date(args.folder, args.dry_run, args.conflict,
+                                                      workers=args.workers, plan_file=args.plan_file,
+                                                      incremental=args.incremental, use_capture_date=not args.use_mtime)
+        elif args.command == "videos":
+            result = organize_videos_by_type_and_date(args.folder, args.dry_run, args.conflict,
+                                                      workers=args.workers, plan_file=args.plan_file,
+                                                      incremental=args.incremental, use_capture_date=not args.use_mtime)
+        elif args.command == "multi":
+            if args.find_duplicates:
+                summary["duplicates"] = find_duplicate_files(args.folders)
+            roots = multi_folder_support(args.dry_run, args.conflict, args.folders, args.concurrent, args.per_device)
+            if roots is not None:
+                summary["roots"] = roots
+        elif args.command == "duplicates":
+            summary["duplicates"] = find_duplicate_files(args.folders, args.report, args.workers)
+        elif args.command == "apply":
+            result = MovePlan.load(args.plan_file)
+            execute_move_plan(result, args.workers)
+        elif args.command == "watch":
+            watch_folder(args.folder, args.conflict, settle_seconds=args.settle)
+        elif args.command == "undo":
+            undo_last_operation(args.run_id)
+        elif args.command == "restore-point":
+            create_restore_point(args.folder, args.output)
+        elif args.command == "restore":
+            summary["restored"] = restore_from_restore_point(args.restore_point, args.dry_run)
+        elif args.command == "benchmark":
+            modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+            unknown = [mode for mode in modes if mode not in benchmark_modes]
+            if unknown:
+                print(f"Unknown benchmark modes: {', '.join(unknown)}", file=sys.stderr)
+                return 2
+            extensions = None
+            if args.extensions:
+                extensions = {}
+                for pair in args.extensions.split(","):
+                    ext, _, weight = pair.strip().partition(":")
+                    extensions[ext if ext.startswith(".") else "." + ext] = float(weight or 1)
+            summary["benchmark"] = run_benchmark(modes, args.files, args.depth, extensions, args.collision_rate,
+                                                 args.date_spread, args.file_size, args.workers, args.repeat,
+                                                 args.dir, args.output, args.baseline, args.seed)["modes"]
+        moves = undo_journal.run_moves if undo_journal.run_id is not None else 0
+        run_id = undo_journal.end_run()
+        events = event_log.report()
+        cross_device = report_cross_device_moves()
+        if profiler.enabled:
+            profiler.print_summary()
+            if args.profile:
+                profiler.save(args.profile)
+                print(f"Profile saved to '{args.profile}'.")
+            if args.trace:
+                profiler.save_trace(args.trace)
+                print(f"Trace saved to '{args.trace}'.")
+
+    if getattr(args, "dry_run", False):
+        summary["dry_run"] = True
+    if result is not None:
+        summary["planned"] = len(result.moves)
+    summary["moved"] = moves
+    if events:
+        summary["events"] = events
+    if cross_device is not None:
+        summary["cross_device"] = cross_device
+    summary["run_id"] = run_id
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    if args.json:
+        print(json.dumps(summary))
+    elif run_id is not None:
+        print(f"Undo run ID: {run_id}")
+    return 0
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(cli(sys.argv[1:]))
     main()
@@ -0,0 +1,20 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "FileORG2.0.py")
+
+
+@pytest.fixture(scope="session")
+def fileorg(tmp_path_factory):
+    """
+    The FileORG2.0.py module, loaded with its state files in a temporary folder.
+    """
+    os.environ["FILEORG_HOME"] = str(tmp_path_factory.mktemp("state"))
+    spec = importlib.util.spec_from_file_location("fileorg", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["fileorg"] = module  # Process pools pickle functions by module name
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,106 @@
+import calendar
+import struct
+
+import pytest
+
+MP4_EPOCH_OFFSET = 2082844800  # Seconds from 1904-01-01 to 1970-01-01
+
+
+def tiff_block(order="<", date_time=None, date_time_original=None):
+    """
+    Builds a minimal TIFF/EXIF block with an IFD0 DateTime and an Exif sub-IFD DateTimeOriginal.
+    """
+    ifd0_offset = 8
+    ifd0_tags = []
+    if date_time is not None:
+        ifd0_tags.append(0x0132)
+    if date_time_original is not None:
+        ifd0_tags.append(0x8769)
+    ifd0_size = 2 + 12 * len(ifd0_tags) + 4
+    exif_offset = ifd0_offset + ifd0_size
+    exif_size = 2 + 12 + 4 if date_time_original is not None else 0
+    data_offset = exif_offset + exif_size
+
+    header = (b"II" if order == "<" else b"MM") + struct.pack(order + "HI", 42, ifd0_offset)
+    data = b""
+    ifd0 = struct.pack(order + "H", len(ifd0_tags))
+    for tag in ifd0_tags:
+        if tag == 0x0132:
+            ifd0 += struct.pack(order + "HHII", tag, 2, 20, data_offset + len(data))
+            data += date_time.encode("ascii") + b"\0"
+        else:
+            ifd0 += struct.pack(order + "HHII", tag, 4, 1, exif_offset)
+    ifd0 += b"\0\0\0\0"
+    exif = b""
+    if date_time_original is not None:
+        exif = struct.pack(order + "H", 1) + struct.pack(order + "HHII", 0x9003, 2, 20, data_offset + len(data))
+        exif += b"\0\0\0\0"
+        data += date_time_original.encode("ascii") + b"\0"
+    return header + ifd0 + exif + data
+
+
+def box(kind, payload):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def mvhd(created, version=0):
+    if version == 1:
+        return box(b"mvhd", bytes([1, 0, 0, 0]) + struct.pack(">QQ", created, created))
+    return box(b"mvhd", bytes(4) + struct.pack(">II", created, created))
+
+
+def noon_utc(year, month, day):
+    return calendar.timegm((year, month, day, 12, 0, 0)) + MP4_EPOCH_OFFSET
+
+
+@pytest.mark.parametrize("order", ["<", ">"])
+def test_exif_date_prefers_date_time_original(fileorg, order):
+    tiff = tiff_block(order, date_time="2021:05:06 10:00:00", date_time_original="2019:12:31 23:59:59")
+    assert fileorg.exif_date(tiff) == "2019-12-31"
+
+
+def test_exif_date_falls_back_to_ifd0_date_time(fileorg):
+    assert fileorg.exif_date(tiff_block(date_time="2021:05:06 10:00:00")) == "2021-05-06"
+
+
+@pytest.mark.parametrize("tiff", [b"", b"XX*\0\x08\0\0\0", tiff_block(), tiff_block(date_time="0000:00:00 00:00:00")])
+def test_exif_date_without_a_usable_date(fileorg, tiff):
+    assert fileorg.exif_date(tiff) is None
+
+
+def test_exif_date_ignores_offsets_past_the_block(fileorg):
+    tiff = tiff_block(date_time="2021:05:06 10:00:00")
+    assert fileorg.exif_date(tiff[:-12]) is None
+
+
+def test_read_jpeg_capture_date(fileorg, tmp_path):
+    exif = b"Exif\0\0" + tiff_block(date_time_original="2018:07:01 08:30:00")
+    jpeg = b"\xff\xd8" + b"\xff\xe0" + struct.pack(">H", 4) + b"JF" + b"\xff\xe1" + struct.pack(">H", 2 + len(exif))
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(jpeg + exif + b"\xff\xda\0\x02")
+    assert fileorg.read_jpeg_capture_date(str(path)) == "2018-07-01"
+    path.write_bytes(b"\xff\xd8\xff\xda\0\x02")
+    assert fileorg.read_jpeg_capture_date(str(path)) is None
+
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_read_mp4_capture_date_with_moov_at_the_end(fileorg, tmp_path, version):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(box(b"ftyp", b"isom\0\0\0\0") + box(b"mdat", bytes(1000))
+                     + box(b"moov", box(b"udta", b"") + mvhd(noon_utc(2020, 2, 29), version)))
+    assert fileorg.read_mp4_capture_date(str(path)) == "2020-02-29"
+
+
+def test_read_mp4_capture_date_with_a_64_bit_box_size(fileorg, tmp_path):
+    mdat = struct.pack(">I4sQ", 1, b"mdat", 16 + 100) + bytes(100)
+    path = tmp_path / "clip.mov"
+    path.write_bytes(mdat + box(b"moov", mvhd(noon_utc(2015, 6, 1))))
+    assert fileorg.read_mp4_capture_date(str(path)) == "2015-06-01"
+
+
+@pytest.mark.parametrize("data", [b"", box(b"ftyp", b"isom"), box(b"moov", mvhd(0)),
+                                  struct.pack(">I4s", 4, b"moov"), box(b"moov", box(b"trak", b""))])
+def test_read_mp4_capture_date_without_a_usable_date(fileorg, tmp_path, data):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(data)
+    assert fileorg.read_mp4_capture_date(str(path)) is None
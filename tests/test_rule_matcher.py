@@ -0,0 +1,103 @@
+import pytest
+
+
+def no_stat():
+    raise AssertionError("stat should not be needed")
+
+
+def match(fileorg, rules, name, path=None, stat=no_stat):
+    return fileorg.RuleMatcher(rules).match(name, path or "/data/" + name, stat)
+
+
+def test_extension_rules_ignore_case(fileorg):
+    rules = [{"category": "Archives", "ext": [".tar.gz", ".tgz"]}]
+    assert match(fileorg, rules, "backup.TAR.GZ") == "Archives"
+    assert match(fileorg, rules, "backup.tgz") == "Archives"
+    assert match(fileorg, rules, "backup.gz") is None
+    assert match(fileorg, rules, ".tgz") is None  # Hidden file, not an extension
+
+
+def test_first_listed_rule_wins_for_compound_extensions(fileorg):
+    gz_first = [{"category": "GZ", "ext": ".gz"}, {"category": "Tarballs", "ext": ".tar.gz"}]
+    tar_first = [{"category": "Tarballs", "ext": ".tar.gz"}, {"category": "GZ", "ext": ".gz"}]
+    assert match(fileorg, gz_first, "a.tar.gz") == "GZ"
+    assert match(fileorg, tar_first, "a.tar.gz") == "Tarballs"
+    assert match(fileorg, tar_first, "a.gz") == "GZ"
+
+
+def test_first_listed_rule_wins_across_stages(fileorg):
+    rules = [{"category": "Scans", "glob": "scan_*"},
+             {"category": "PDFs", "ext": ".pdf"},
+             {"category": "Invoices", "name": "invoice"}]
+    assert match(fileorg, rules, "scan_invoice.pdf") == "Scans"
+    assert match(fileorg, rules, "invoice.pdf") == "PDFs"
+    assert match(fileorg, rules, "invoice.txt") == "Invoices"
+
+
+def test_globs_ignore_case_and_match_the_whole_name(fileorg):
+    rules = [{"category": "Camera", "glob": ["IMG_*", "*.raw"]}]
+    assert match(fileorg, rules, "img_0001.jpg") == "Camera"
+    assert match(fileorg, rules, "photo.RAW") == "Camera"
+    assert match(fileorg, rules, "my_IMG_1.jpg") is None
+
+
+@pytest.mark.parametrize("regex", ["(?i)invoice", "(?i)(inv)oice", "(?ix) in voice  # verbose"])
+def test_leading_global_flags(fileorg, regex):
+    rules = [{"category": "Plain", "name": "unrelated"}, {"category": "Invoices", "name": regex}]
+    assert match(fileorg, rules, "INVOICE_2024.pdf") == "Invoices"
+    assert match(fileorg, rules, "receipt.pdf") is None
+
+
+def test_path_regexes_search_the_full_path(fileorg):
+    rules = [{"category": "Taxes", "path": "(?i)/taxes/"}]
+    assert match(fileorg, rules, "a.pdf", "/home/me/Taxes/a.pdf") == "Taxes"
+    assert match(fileorg, rules, "taxes.pdf", "/home/me/taxes.pdf") is None
+
+
+def test_backreferences_and_named_groups(fileorg):
+    rules = [{"category": "Plain", "name": "draft"},
+             {"category": "Doubled", "name": r"(\w)\1x"},
+             {"category": "Years", "name": r"(?P<year>20\d\d)-(?P=year)"}]
+    assert match(fileorg, rules, "aax.txt") == "Doubled"
+    assert match(fileorg, rules, "abx.txt") is None
+    assert match(fileorg, rules, "2020-2020.txt") == "Years"
+    assert match(fileorg, rules, "2020-2021.txt") is None
+    assert match(fileorg, rules, "draft.txt") == "Plain"
+
+
+def test_size_and_date_conditions_stat_lazily(fileorg):
+    calls = []
+
+    def stat():
+        calls.append(1)
+        return type("Stat", (), {"st_size": 20 << 20, "st_mtime": 0})()
+
+    rules = [{"category": "Big videos", "ext": ".mp4", "min_size": "10MB"},
+             {"category": "Old", "modified_before": "2000-01-01"}]
+    assert match(fileorg, rules, "clip.mp4", stat=stat) == "Big videos"
+    assert match(fileorg, rules, "notes.txt", stat=stat) == "Old"
+    assert len(calls) == 2  # Once per file
+
+
+def test_unstattable_files_do_not_match_size_rules(fileorg):
+    def stat():
+        raise FileNotFoundError
+
+    assert match(fileorg, [{"category": "Big", "min_size": 1}], "gone.bin", stat=stat) is None
+
+
+@pytest.mark.parametrize("rule", [{"category": "Broken", "name": "(unclosed"},
+                                  {"category": "Broken", "colour": "red"},
+                                  {"ext": ".txt"},
+                                  {"category": "Broken", "min_size": "lots"}])
+def test_invalid_rules_raise_value_error(fileorg, rule):
+    with pytest.raises(ValueError):
+        fileorg.RuleMatcher([rule])
+
+
+def test_parse_size(fileorg):
+    assert fileorg.parse_size(512) == 512
+    assert fileorg.parse_size("10KB") == 10 << 10
+    assert fileorg.parse_size("2.5 gb") == 2.5 * (1 << 30)
+    with pytest.raises(ValueError):
+        fileorg.parse_size("10 parsecs")
@@ -0,0 +1,55 @@
+import pytest
+
+
+def ftyp(brand):
+    return b"\x00\x00\x00\x18ftyp" + brand + b"\x00\x00\x00\x00" + brand + b"mif1"
+
+
+@pytest.mark.parametrize("head, category", [
+    (b"\x89PNG\r\n\x1a\n" + bytes(8), "Image Files"),
+    (b"\xff\xd8\xff\xe0\x00\x10JFIF", "Image Files"),
+    (b"GIF89a" + bytes(8), "Image Files"),
+    (b"BM" + bytes(4) + b"\x00\x00\x00\x00" + bytes(20), "Image Files"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "Image Files"),
+    (b"RIFF\x00\x00\x00\x00AVI LIST", "Video Files"),
+    (b"RIFF\x00\x00\x00\x00WAVEfmt ", "Audio Files"),
+    (ftyp(b"isom"), "Video Files"),
+    (ftyp(b"qt  "), "Video Files"),
+    (ftyp(b"M4A "), "Audio Files"),
+    (ftyp(b"heic"), "Image Files"),
+    (ftyp(b"heix"), "Image Files"),
+    (ftyp(b"mif1"), "Image Files"),
+    (ftyp(b"msf1"), "Image Files"),
+    (ftyp(b"avif"), "Image Files"),
+    (b"%PDF-1.7\n", "Document Files"),
+    (b"PK\x03\x04" + bytes(26) + b"[Content_Types].xml", "Document Files"),
+    (b"PK\x03\x04" + bytes(26) + b"photos/a.jpg", "Compressed Files"),
+    (b"\x1f\x8b\x08\x00", "Compressed Files"),
+    (bytes(257) + b"ustar\x0000", "Compressed Files"),
+    (b"ID3\x04\x00", "Audio Files"),
+    (b"\x7fELF\x02\x01", "Executable Files"),
+    (b"#!/bin/sh\n", "Executable Files"),
+    (b"SQLite format 3\x00", "Database Files"),
+])
+def test_known_signatures(fileorg, head, category):
+    assert fileorg.sniff_content_type(head) == category
+
+
+@pytest.mark.parametrize("head", [b"", b"plain text notes", b"RIFF\x00\x00\x00\x00XXXX", b"BM"])
+def test_unknown_content(fileorg, head):
+    assert fileorg.sniff_content_type(head) is None
+
+
+def test_sniff_category_caches_results_and_only_returns_existing_categories(fileorg, tmp_path, monkeypatch):
+    path = tmp_path / "photo"
+    path.write_bytes(ftyp(b"heic"))
+    monkeypatch.setattr(fileorg, "content_type_cache",
+                        fileorg.MetadataCache(str(tmp_path / "cache.sqlite3"), table="content_types_v2",
+                                              column="category"))
+    st = path.stat()
+    assert fileorg.sniff_category(str(path), st) == "Image Files"
+    fileorg.content_type_cache.flush()
+    path.write_bytes(b"%PDF-" + bytes(len(ftyp(b"heic")) - 5))  # Same size, cached key unchanged
+    assert fileorg.sniff_category(str(path), st) == "Image Files"
+    monkeypatch.delitem(fileorg.categories, "Image Files")
+    assert fileorg.sniff_category(str(path), st) is None
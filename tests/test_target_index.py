@@ -0,0 +1,66 @@
+import os
+import threading
+
+
+def test_allocate_numbers_past_existing_and_claimed_names(fileorg, tmp_path):
+    for name in ("a.txt", "a_1.txt", "a_3.txt"):
+        (tmp_path / name).write_text(name)
+    index = fileorg.TargetIndex()
+    target = str(tmp_path / "a.txt")
+    assert index.allocate(target) == str(tmp_path / "a_2.txt")
+    assert index.allocate(target) == str(tmp_path / "a_4.txt")
+    assert index.exists(str(tmp_path / "a_4.txt"))
+
+
+def test_allocate_keeps_the_extension_and_dotted_names(fileorg, tmp_path):
+    index = fileorg.TargetIndex()
+    assert index.allocate(str(tmp_path / "archive.tar.gz")) == str(tmp_path / "archive.tar_1.gz")
+    assert index.allocate(str(tmp_path / "README")) == str(tmp_path / "README_1")
+
+
+def test_allocate_in_a_listed_folder(fileorg, tmp_path, monkeypatch):
+    monkeypatch.setattr(fileorg.TargetIndex, "probe_limit", 0)  # List the folder on first use
+    (tmp_path / "a_1.txt").write_text("")
+    index = fileorg.TargetIndex()
+    assert index.allocate(str(tmp_path / "a.txt")) == str(tmp_path / "a_2.txt")
+
+
+def test_concurrent_allocations_are_unique(fileorg, tmp_path):
+    index = fileorg.TargetIndex()
+    target = str(tmp_path / "photo.jpg")
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        names = [index.allocate(target) for _ in range(50)]
+        with lock:
+            results.extend(names)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(results)) == len(results) == 400
+    assert sorted(int(os.path.splitext(path)[0].rsplit("_", 1)[1]) for path in results) == list(range(1, 401))
+
+
+def test_case_insensitive_folders_fold_names(fileorg, tmp_path):
+    (tmp_path / "IMG.JPG").write_text("")
+    index = fileorg.TargetIndex()
+    index._fold[str(tmp_path)] = True  # As on a default Windows or macOS volume
+    index.claim(str(tmp_path / "Photo.jpg"))
+    assert index.exists(str(tmp_path / "photo.JPG"))
+    assert index.allocate(str(tmp_path / "photo.jpg")) == str(tmp_path / "photo_1.jpg")
+    assert index.allocate(str(tmp_path / "PHOTO.JPG")) == str(tmp_path / "PHOTO_2.JPG")
+
+
+def test_for_execution_drops_planning_claims(fileorg, tmp_path, monkeypatch):
+    monkeypatch.setattr(fileorg.TargetIndex, "probe_limit", 0)
+    (tmp_path / "old.txt").write_text("")
+    planning = fileorg.TargetIndex()
+    planning.claim(str(tmp_path / "new.txt"))
+    assert planning.exists(str(tmp_path / "old.txt"))
+    execution = planning.for_execution()
+    assert execution.exists(str(tmp_path / "old.txt"))
+    assert not execution.exists(str(tmp_path / "new.txt"))
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def journal(fileorg, tmp_path):
+    return fileorg.UndoJournal(str(tmp_path / "journal.jsonl"), batch_size=1000, fsync_interval=3600)
+
+
+def write_lines(journal, lines):
+    with open(journal.path, "w", encoding="utf-8") as f:
+        f.writelines(line + "\n" for line in lines)
+
+
+def test_missing_journal_yields_nothing(journal):
+    assert list(journal.iter_backwards()) == []
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+def test_iter_backwards_yields_newest_first_with_offsets(journal, chunk_size):
+    records = [{"op": "move", "run": "r", "source": f"s{i}" * i, "target": f"t{i}"} for i in range(20)]
+    lines = [json.dumps(record) for record in records]
+    write_lines(journal, lines)
+    with open(journal.path, "rb") as f:
+        data = f.read()
+
+    result = list(journal.iter_backwards(chunk_size=chunk_size))
+    assert [record for _, record in result] == records[::-1]
+    for offset, record in result:
+        assert json.loads(data[offset:data.index(b"\n", offset)]) == record
+
+
+def test_iter_backwards_skips_torn_and_blank_lines(journal):
+    write_lines(journal, ['{"op": "begin", "run": "r"}', "", '{"op": "move", "run": "r", "source": "a", "target": "b"}',
+                          '{"op": "move", "run": "r", "sou'])
+    assert [record["op"] for _, record in journal.iter_backwards(chunk_size=5)] == ["move", "begin"]
+
+
+def test_iter_backwards_from_offset(journal):
+    write_lines(journal, [json.dumps({"op": "move", "n": n}) for n in range(5)])
+    offsets = {record["n"]: offset for offset, record in journal.iter_backwards()}
+    assert [record["n"] for _, record in journal.iter_backwards(start=offsets[3])] == [2, 1, 0]
+
+
+def test_buffered_records_are_flushed_before_reading(journal):
+    journal.record_move("a", "b")
+    journal.record_move("c", "d")
+    ops = [(record["op"], record.get("source")) for _, record in journal.iter_backwards()]
+    assert ops == [("move", "c"), ("move", "a"), ("begin", None)]
+
+
+def test_records_are_written_once_the_fsync_interval_elapses(journal):
+    journal.fsync_interval = 0
+    journal.record_move("a", "b")
+    with open(journal.path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2  # begin and move, without waiting for a full batch